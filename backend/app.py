@@ -1,20 +1,10 @@
-# Import necessary modules from the Flask framework and related extensions
-from flask import Flask
-from flask_cors import CORS
-
-# Import the main blueprint and configuration settings
-from app import bp as main_bp
+# Import the application factory and configuration settings
+from app import create_app
 from config import Config
 
 # Create a Flask application instance
-app = Flask(__name__)
-
-# Configure Cross-Origin Resource Sharing (CORS) for the app
-cors = CORS(app, resources={r"/*": {"origins": Config.ORIGINS}})
-
-# Register the blueprint with the application
-app.register_blueprint(main_bp)
+app = create_app()
 
 # Run the application only if this file is executed as the main program
 if __name__ == '__main__':
-    app.run(port=Config.PORT, debug=Config.DEBUG)
+    app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
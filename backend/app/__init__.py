@@ -1,8 +1,24 @@
-# Import Blueprint class from Flask
-from flask import Blueprint
+# Import Blueprint and Flask classes from Flask
+from flask import Blueprint, Flask
 
 # Create a Blueprint instance for the 'main' module
 bp = Blueprint('main', __name__)
 
 # Import routes; this is done after the Blueprint instance to avoid circular imports
-from app import routes
\ No newline at end of file
+from app import routes
+
+
+def create_app():
+    """Create the Flask application serving the main blueprint, for the development server and WSGI servers alike."""
+    from flask_cors import CORS
+    from config import Config
+
+    # Create a Flask application instance
+    app = Flask(__name__)
+
+    # Configure Cross-Origin Resource Sharing (CORS) for the app
+    CORS(app, resources={r"/*": {"origins": Config.ORIGINS}})
+
+    # Register the blueprint with the application
+    app.register_blueprint(bp)
+    return app
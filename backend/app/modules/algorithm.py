@@ -1,14 +1,45 @@
+from functools import lru_cache
+
 import numpy as np
 from scipy.stats import binom
 
+from app.modules import kernels
+from app.modules.solve_cache import SolveCache
+
+# Number of steps of the belief grid used by the risk endpoints; value tables hold resolution - 1 points
+RESOLUTION = 1000
+
+# Binomial quantiles m already evaluated by calculate_cost, keyed on (N, attack_prob, alpha)
+quantile_cache = SolveCache(maxsize=4096)
+
+
+def _binomial_quantiles(N, attack_probs, alpha):
+    keys = [(N, attack_prob, alpha) for attack_prob in attack_probs]
+    quantiles = [quantile_cache.get(key) for key in keys]
+
+    # Evaluate every quantile missing from the table in one vectorized call
+    missing = [k for k, m in enumerate(quantiles) if m is None]
+    if missing:
+        values = binom.ppf(1 - alpha, N, [attack_probs[k] for k in missing])
+        for k, m in zip(missing, values):
+            quantiles[k] = int(m)
+            quantile_cache.put(keys[k], quantiles[k])
+
+    return quantiles
+
+
 def calculate_cost(p, alpha=0.05):
     N = len(p)
     costs = []
 
+    # generate_p mostly repeats the same few probabilities, so each distinct
+    # attack probability is only looked up once
+    attack_probs = list(dict.fromkeys(1 - p_i for p_i in p))
+    quantiles = dict(zip(attack_probs, _binomial_quantiles(N, attack_probs, alpha)))
+
     for p_i in p:
         attack_prob = 1 - p_i
-        m = binom.ppf(1 - alpha, N, attack_prob)
-        m = int(m)
+        m = quantiles[attack_prob]
 
         if m == 0:
             c_min = 1.0
@@ -23,103 +54,338 @@ def calculate_cost(p, alpha=0.05):
     return costs
 
 
-def value_iteration(p, c, p11, p22):
-    N = len(p)
-    a = np.zeros((N + 1, 999))
-    b = np.zeros((N, 999), dtype=bool)
-
-    p21 = 1 - p11
-    p12 = 1 - p22
-    a[0, :] = np.ones(999)
-
-    for i in range(1, N + 1):
-        pp = p[N - i]
-        cc = c[N - i]
-
-        g1 = pp * p21 / (pp * p21 + (1 - pp) * p22)
-        g2 = pp * p11 / (pp * p11 + (1 - pp) * p12)
-        f1 = pp * p21 + (1 - pp) * p22
-        f2 = pp * p11 + (1 - pp) * p12
-
-        for j in range(1, 1000):
-            x = j / 1000.0
-
-            g1_floor = int(np.floor(g1 * 1000))
-            g1_ceil = int(np.ceil(g1 * 1000))
-            g2_floor = int(np.floor(g2 * 1000))
-            g2_ceil = int(np.ceil(g2 * 1000))
-
-            g1_floor = min(g1_floor, 998)
-            g1_ceil = min(g1_ceil, 998)
-            g2_floor = min(g2_floor, 998)
-            g2_ceil = min(g2_ceil, 998)
+@lru_cache(maxsize=16)
+def belief_grid(resolution=RESOLUTION):
+    """Return the belief points x = j / resolution for j = 1..resolution - 1 of the value tables."""
+    x = np.arange(1, resolution) / float(resolution)
+    x.flags.writeable = False
+    return x
 
-            vcorr = (-cc
-                     + f1 * (a[i-1, g1_floor] + (g1 * 1000 - g1_floor) * (a[i-1, g1_ceil] - a[i-1, g1_floor]))
-                     + f2 * (a[i-1, g2_floor] + (g2 * 1000 - g2_floor) * (a[i-1, g2_ceil] - a[i-1, g2_floor])))
 
-            vemp = (f1 * x * (a[i-1, g1_floor] + (g1 * 1000 - g1_floor) * (a[i-1, g1_ceil] - a[i-1, g1_floor]))
-                    + f2 * x * (a[i-1, g2_floor] + (g2 * 1000 - g2_floor) * (a[i-1, g2_ceil] - a[i-1, g2_floor])))
+def _interpolation_stencil(g, resolution=RESOLUTION):
+    g_floor = np.minimum(np.floor(g * resolution).astype(int), resolution - 2)
+    g_ceil = np.minimum(np.ceil(g * resolution).astype(int), resolution - 2)
 
-            a[i, j-1] = max(vcorr, vemp)
+    return g_floor, g_ceil, g * resolution - g_floor
 
-            if a[i, j-1] == vemp:
-                b[i-1, j-1] = True
 
+def _policy_thresholds(b):
+    size = b.shape[1]
     diff_b = np.diff(b, axis=1)
     r1, c1 = np.where(diff_b)
 
-    h = np.where(np.sum(b, axis=1) == 999)[0]
+    h = np.where(np.sum(b, axis=1) == size)[0]
     r1 = np.concatenate((r1, h))
     c1 = np.concatenate((c1, np.zeros(len(h), dtype=int)))
 
     h = np.where(np.sum(b, axis=1) == 0)[0]
     r1 = np.concatenate((r1, h))
-    c1 = np.concatenate((c1, np.full(len(h), 999)))
+    c1 = np.concatenate((c1, np.full(len(h), size)))
 
     ix = np.argsort(r1)[::-1]
     r1 = r1[ix]
     c1 = c1[ix]
-    thresh = c1 / 1000.0
+    thresh = c1 / float(size + 1)
+
+    return thresh
+
+
+def bellman_backup(previous, pp, cc, p11, p22, backend=None):
+    """
+    One backward stage of value iteration for a batch of transactions.
+    `previous` is the (batch, resolution - 1) value table of the following stage, `pp` and `cc` the
+    (batch,) stage probabilities and costs, `p11` and `p22` scalars or (batch,) arrays.
+    Returns the (batch, resolution - 1) value table and policy of the stage.
+    """
+    if (backend or kernels.BACKEND) == "numba":
+        batch = len(previous)
+        return kernels.bellman_backup(
+            np.ascontiguousarray(previous, dtype=float),
+            np.broadcast_to(np.asarray(pp, dtype=float), (batch,)),
+            np.broadcast_to(np.asarray(cc, dtype=float), (batch,)),
+            np.broadcast_to(np.asarray(p11, dtype=float), (batch,)),
+            np.broadcast_to(np.asarray(p22, dtype=float), (batch,))
+        )
+
+    resolution = previous.shape[1] + 1
+    x = belief_grid(resolution)
+
+    p21 = 1 - p11
+    p12 = 1 - p22
+
+    g1 = pp * p21 / (pp * p21 + (1 - pp) * p22)
+    g2 = pp * p11 / (pp * p11 + (1 - pp) * p12)
+    f1 = pp * p21 + (1 - pp) * p22
+    f2 = pp * p11 + (1 - pp) * p12
+
+    # The posteriors only depend on the stage prior, so both interpolated
+    # continuation values are shared by every belief point of the stage
+    g1_floor, g1_ceil, w1 = _interpolation_stencil(g1, resolution)
+    g2_floor, g2_ceil, w2 = _interpolation_stencil(g2, resolution)
+    rows = np.arange(len(previous))
+
+    v1 = previous[rows, g1_floor] + w1 * (previous[rows, g1_ceil] - previous[rows, g1_floor])
+    v2 = previous[rows, g2_floor] + w2 * (previous[rows, g2_ceil] - previous[rows, g2_floor])
+
+    vcorr = (-cc + f1 * v1 + f2 * v2)[:, None]
+    vemp = f1[:, None] * x * v1[:, None] + f2[:, None] * x * v2[:, None]
+
+    # Ties resolve to the empirical choice, as max(vcorr, vemp) == vemp did
+    policy = vemp >= vcorr
+
+    return np.where(policy, vemp, vcorr), policy
+
+
+def value_iteration_batch(p, c, p11, p22, resolution=RESOLUTION, backend=None):
+    """
+    Run value iteration for a batch of transactions of the same length at once.
+    `p` and `c` are (batch, N) arrays, `p11` and `p22` are scalars or (batch,) arrays.
+    Returns the stacked (batch, N + 1, resolution - 1) value tables, (batch, N, resolution - 1)
+    policies and a list of thresholds.
+    `backend` overrides the kernel backend selected at import time ("numba" or "numpy").
+    """
+    p = np.asarray(p, dtype=float)
+    c = np.asarray(c, dtype=float)
+    batch, N = p.shape
+
+    p11 = np.broadcast_to(np.asarray(p11, dtype=float), (batch,))
+    p22 = np.broadcast_to(np.asarray(p22, dtype=float), (batch,))
+
+    if (backend or kernels.BACKEND) == "numba":
+        a, b = kernels.value_iteration(p, c, p11, p22, resolution)
+    else:
+        a = np.zeros((batch, N + 1, resolution - 1))
+        b = np.zeros((batch, N, resolution - 1), dtype=bool)
+        a[:, 0, :] = 1.0
+
+        for i in range(1, N + 1):
+            a[:, i], b[:, i-1] = bellman_backup(a[:, i-1], p[:, N - i], c[:, N - i], p11, p22, "numpy")
+
+    thresh = [_policy_thresholds(policy) for policy in b]
 
     return a, b, thresh
 
 
+def value_iteration(p, c, p11, p22, resolution=RESOLUTION, backend=None):
+    a, b, thresh = value_iteration_batch([p], [c], p11, p22, resolution, backend)
+
+    return a[0], b[0], thresh[0]
+
+
+class IncrementalSolver:
+    """
+    Value iteration for a sequence of related transactions, such as a length sweep.
+    Value iteration runs backward from the last stage, so transactions ending with the same
+    (p, c) stages share their first value tables; each shared table is only computed once.
+    """
+
+    def __init__(self, p11, p22, resolution=RESOLUTION):
+        self.p11 = p11
+        self.p22 = p22
+        self.resolution = resolution
+        self.computed = 0
+        self.reused = 0
+
+        # Stage tables form a tree rooted at the terminal values, keyed on (parent, p_i, c_i)
+        self._children = {}
+        self._tables = [(np.ones(resolution - 1), None)]
+
+    def solve(self, p, c):
+        """Return the same (a, b, thresh) as value_iteration(p, c, p11, p22, resolution)."""
+        N = len(p)
+        a = np.zeros((N + 1, self.resolution - 1))
+        b = np.zeros((N, self.resolution - 1), dtype=bool)
+        a[0] = self._tables[0][0]
+
+        node = 0
+        for i in range(1, N + 1):
+            key = (node, float(p[N - i]), float(c[N - i]))
+            child = self._children.get(key)
+
+            if child is None:
+                values, policy = bellman_backup(
+                    self._tables[node][0][None], np.array([key[1]]), np.array([key[2]]), self.p11, self.p22
+                )
+                child = len(self._tables)
+                self._tables.append((values[0], policy[0]))
+                self._children[key] = child
+                self.computed += 1
+            else:
+                self.reused += 1
+
+            node = child
+            a[i], b[i-1] = self._tables[node]
+
+        return a, b, _policy_thresholds(b)
+
+
+@lru_cache(maxsize=128)
+def _risk_stencil(p11, p22, resolution=RESOLUTION):
+    p21 = 1 - p11
+    p12 = 1 - p22
+    x = np.arange(resolution - 1) / float(resolution)
+
+    g1 = x * p21 / (x * p21 + (1 - x) * p22)
+    g2 = x * p11 / (x * p11 + (1 - x) * p12)
+    f1 = x * p21 + (1 - x) * p22
+    f2 = x * p11 + (1 - x) * p12
+
+    stencil = (*_interpolation_stencil(g1, resolution), f1, *_interpolation_stencil(g2, resolution), f2)
+    for array in stencil:
+        array.flags.writeable = False
+
+    return stencil
+
+
 def calculate_risk(a, p, p11, p22):
-    N = a.shape[0]
-    num_x = 999
+    # Posterior indices and weights only depend on x, p11 and p22, so every
+    # stage is evaluated with one gather-and-blend over the cached stencil
+    g1_floor, g1_ceil, w1, f1, g2_floor, g2_ceil, w2, f2 = _risk_stencil(p11, p22, a.shape[-1] + 1)
+
+    V_x = f1 * (a[:, g1_floor] + w1 * (a[:, g1_ceil] - a[:, g1_floor])) + \
+          f2 * (a[:, g2_floor] + w2 * (a[:, g2_ceil] - a[:, g2_floor]))
+
+    return 1 - V_x
+
+
+class RiskSurface:
+    """
+    Lazy view of the calculate_risk matrix for a value table `a`.
+    Rows and cells are only computed when they are accessed, and rows are kept once built.
+    """
+
+    def __init__(self, a, p11, p22):
+        self.a = a
+        self.p11 = p11
+        self.p22 = p22
+        self.shape = a.shape
+        self.resolution = a.shape[1] + 1
+        self._rows = {}
+
+    def _stage(self, i):
+        return range(self.shape[0])[i]
+
+    def row(self, i):
+        """Return the risk values of stage `i` over the whole belief grid."""
+        i = self._stage(i)
+        if i not in self._rows:
+            self._rows[i] = calculate_risk(self.a[i:i + 1], None, self.p11, self.p22)[0]
+        return self._rows[i]
+
+    def cell(self, i, j):
+        """Return the risk value of stage `i` at belief grid index `j`."""
+        i = self._stage(i)
+        if i in self._rows:
+            return self._rows[i][j]
+
+        g1_floor, g1_ceil, w1, f1, g2_floor, g2_ceil, w2, f2 = _risk_stencil(self.p11, self.p22, self.resolution)
+        values = self.a[i]
+
+        V_x = f1[j] * (values[g1_floor[j]] + w1[j] * (values[g1_ceil[j]] - values[g1_floor[j]])) + \
+              f2[j] * (values[g2_floor[j]] + w2[j] * (values[g2_ceil[j]] - values[g2_floor[j]]))
+
+        return 1 - V_x
+
+    def at(self, x, stage=-1):
+        """Return the risk value of `stage` at belief `x`, snapped to the grid like the risk endpoints."""
+        return self.cell(stage, min(int(x * self.resolution), self.resolution - 2))
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.cell(*key)
+        return self.row(key)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array([self.row(i) for i in range(self.shape[0])], dtype=dtype)
+
+
+def risk_at(a, x, p11, p22, stage=-1):
+    """Return a single risk value of the calculate_risk matrix without building the matrix."""
+    return RiskSurface(a, p11, p22).at(x, stage)
+
+
+def _threshold_knots(threshold, spacing, levels):
+    offsets = spacing / 2.0 ** np.arange(1, levels + 1)
+    return np.concatenate(([threshold], threshold - offsets, threshold + offsets))
 
+
+def adaptive_value_iteration(p, c, p11, p22, points=100, levels=4):
+    """
+    Value iteration on a piecewise-linear belief grid of `points` uniform steps, refined with
+    `levels` extra knots on each side of the policy threshold of every stage.
+    Returns the knots and values of the N + 1 stage tables.
+    """
+    N = len(p)
     p21 = 1 - p11
     p12 = 1 - p22
-    risk_values = np.zeros((N, num_x))
 
-    for i in range(N):
-        for j in range(999):
-            x = j / 1000.0
+    base = np.linspace(0.0, 1.0, points + 1)
+    knots = [base]
+    values = [np.ones(points + 1)]
 
-            g1 = x * p21 / (x * p21 + (1 - x) * p22)
-            g2 = x * p11 / (x * p11 + (1 - x) * p12)
+    for i in range(1, N + 1):
+        pp = p[N - i]
+        cc = c[N - i]
 
-            g1_floor = int(np.floor(g1 * 1000))
-            g1_ceil = int(np.ceil(g1 * 1000))
-            g2_floor = int(np.floor(g2 * 1000))
-            g2_ceil = int(np.ceil(g2 * 1000))
+        g1 = pp * p21 / (pp * p21 + (1 - pp) * p22)
+        g2 = pp * p11 / (pp * p11 + (1 - pp) * p12)
+        f1 = pp * p21 + (1 - pp) * p22
+        f2 = pp * p11 + (1 - pp) * p12
+
+        V = f1 * np.interp(g1, knots[-1], values[-1]) + f2 * np.interp(g2, knots[-1], values[-1])
 
-            g1_floor = min(g1_floor, 998)
-            g1_ceil = min(g1_ceil, 998)
-            g2_floor = min(g2_floor, 998)
-            g2_ceil = min(g2_ceil, 998)
+        # The stage value max(V - cc, x * V) is linear on both sides of the
+        # threshold where b flips, so the knots are concentrated around it
+        stage_knots = base
+        if V > 0 and 0 < (V - cc) / V < 1:
+            refined = _threshold_knots((V - cc) / V, 1.0 / points, levels)
+            stage_knots = np.unique(np.concatenate((base, np.clip(refined, 0.0, 1.0))))
 
-            V_x = (x * p21 + (1 - x) * p22) * (a[i, g1_floor] + (g1 * 1000 - g1_floor) * (a[i, g1_ceil] - a[i, g1_floor])) + \
-                  (x * p11 + (1 - x) * p12) * (a[i, g2_floor] + (g2 * 1000 - g2_floor) * (a[i, g2_ceil] - a[i, g2_floor]))
+        knots.append(stage_knots)
+        values.append(np.maximum(-cc + V, stage_knots * V))
 
+    return knots, values
 
-            risk_values[i, j] = 1 - V_x
 
-    return risk_values
+def adaptive_risk_at(knots, values, x, p11, p22, stage=-1):
+    """Return the risk value of `stage` at belief `x` from an adaptive_value_iteration result."""
+    p21 = 1 - p11
+    p12 = 1 - p22
+
+    g1 = x * p21 / (x * p21 + (1 - x) * p22)
+    g2 = x * p11 / (x * p11 + (1 - x) * p12)
+
+    V_x = (x * p21 + (1 - x) * p22) * np.interp(g1, knots[stage], values[stage]) + \
+          (x * p11 + (1 - x) * p12) * np.interp(g2, knots[stage], values[stage])
+
+    return 1 - V_x
+
+
+def estimate_risk(p, c, p11, p22, x, resolution=RESOLUTION, adaptive=False, stage=-1, error=True):
+    """
+    Solve a transaction and return (risk, error) at belief `x` for a belief grid of `resolution` steps.
+    `error` estimates the interpolation error as the change from the same solve at half the resolution;
+    it is None, and the second solve skipped, when `error` is False.
+    With `adaptive`, the grid is refined around the policy thresholds instead of being uniform,
+    which reaches the same accuracy with far fewer points.
+    """
+    if resolution < 4:
+        raise ValueError("The belief grid needs a resolution of at least 4.")
+
+    estimates = []
+    for steps in (resolution, resolution // 2) if error else (resolution,):
+        if adaptive:
+            knots, values = adaptive_value_iteration(p, c, p11, p22, steps)
+            estimates.append(adaptive_risk_at(knots, values, x, p11, p22, stage))
+        else:
+            a, b, thresh = value_iteration(p, c, p11, p22, steps)
+            estimates.append(risk_at(a, x, p11, p22, stage))
+
+    return estimates[0], abs(estimates[0] - estimates[1]) if error else None
 
 
 def update_belief(states, belief, action, observation, transition_model, observation_model):
+    """Bayes filter step of a single belief dict; BeliefModel updates many transactions at once."""
     new_belief = {}
     eta = 0
 
@@ -144,31 +410,6 @@ def update_belief(states, belief, action, observation, transition_model, observa
     return new_belief
 
 
-def find_path_length(paths, start_node, threat_node):
-  level = 0
-  queue = set([start_node])
-  seen = set([start_node])
-  threat_level = {}
-  
-  while queue:
-    next_queue = set()
-    
-    for node in queue:
-      if node not in threat_level and node in threat_node:
-        threat_level[node] = level
-        
-      if node not in paths: continue
-      for neighbor in paths[node]:
-        if neighbor not in seen:
-          next_queue.add(neighbor)
-          seen.add(neighbor)
-      
-    queue = next_queue
-    level += 1
-  
-  return [level, threat_level]
-
-
 def generate_p(path_length, probability_of_threat, threat_level, perfect_condition = True):
   p =  [ 0.95 ] * path_length
   
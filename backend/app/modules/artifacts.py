@@ -0,0 +1,128 @@
+# Import necessary modules from standard library
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Import the application configuration and the artifacts directory
+from config import Config
+from app.utils import artifacts_path
+
+# Format of the stored artifacts; bump it whenever the layout or the solver output changes
+ARTIFACT_VERSION = 2
+
+# Solver outputs stored per solve, as <name>.npy
+ARTIFACT_ARRAYS = ("a", "b", "thresh")
+
+# File holding the points of a stored analysis sweep
+ROWS_FILE = "rows.json"
+
+
+class SolverArtifacts:
+    """
+    Solves and analysis sweeps of the projects, persisted as `<path>/<project>/v<version>-<key>/`: the value tables
+    of a solve as one .npy file per array, the points of a sweep as one JSON file. Tables are loaded memory-mapped
+    and read-only, so every worker process shares the same pages. Everything of a project is dropped whenever
+    the project is saved. The directory is kept apart from the projects so writing it never looks like a project change.
+    """
+
+    def __init__(self, path, max_entries=16):
+        self.path = path
+        self.max_entries = max_entries
+
+    def _project_path(self, project):
+        # Only plain project names get artifacts, so a name can never point outside the artifacts directory
+        if not project or project.startswith('.') or os.sep in project or '/' in project:
+            return None
+        return os.path.join(self.path, project)
+
+    def _entry_path(self, project, key):
+        project_path = self._project_path(project)
+        return None if project_path is None else os.path.join(project_path, f"v{ARTIFACT_VERSION}-{key}")
+
+    def load(self, project, key):
+        """Return the memory-mapped (a, b, thresh) of solve `key` of `project`, or None if they are not stored."""
+        entry_path = self._entry_path(project, key)
+        if entry_path is None:
+            return None
+
+        try:
+            return tuple(np.load(os.path.join(entry_path, f"{name}.npy"), mmap_mode='r') for name in ARTIFACT_ARRAYS)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, project, key, *arrays):
+        """Store the solver outputs (a, b, thresh) of solve `key` of `project`."""
+        def write(temp_path):
+            for name, array in zip(ARTIFACT_ARRAYS, arrays):
+                np.save(os.path.join(temp_path, f"{name}.npy"), np.asarray(array))
+
+        self._store(project, key, write)
+
+    def load_rows(self, project, key):
+        """Return the points of analysis sweep `key` of `project`, or None if they are not stored."""
+        entry_path = self._entry_path(project, key)
+        if entry_path is None:
+            return None
+
+        try:
+            with open(os.path.join(entry_path, ROWS_FILE)) as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_rows(self, project, key, rows):
+        """Store the points of analysis sweep `key` of `project`."""
+        def write(temp_path):
+            with open(os.path.join(temp_path, ROWS_FILE), "w") as file:
+                json.dump(rows, file)
+
+        self._store(project, key, write)
+
+    def _store(self, project, key, write):
+        # Store entry `key` of `project` with `write(directory)`, keeping the project's `max_entries` latest entries
+        project_path = self._project_path(project)
+        if project_path is None or self.max_entries <= 0:
+            return
+
+        # Write into a temporary directory first so readers never load a partially written entry
+        try:
+            os.makedirs(project_path, exist_ok=True)
+            temp_path = tempfile.mkdtemp(dir=project_path, prefix=".entry.")
+        except OSError:
+            return
+
+        try:
+            write(temp_path)
+            os.rename(temp_path, self._entry_path(project, key))
+        except OSError:
+            # Another process stored the same entry first, or the directory is not writable
+            shutil.rmtree(temp_path, ignore_errors=True)
+            return
+
+        self._prune(project_path)
+
+    def _prune(self, project_path):
+        # Drop the oldest entries beyond the limit, e.g. of unsaved edits of the graph
+        try:
+            with os.scandir(project_path) as entries:
+                stored = [entry for entry in entries if entry.is_dir() and not entry.name.startswith('.')]
+            stored.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        except OSError:
+            # The project was saved (or its entries pruned) by another process meanwhile
+            return
+
+        for entry in stored[self.max_entries:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def invalidate(self, project):
+        """Drop every stored solve and sweep of `project`."""
+        project_path = self._project_path(project)
+        if project_path is not None:
+            shutil.rmtree(project_path, ignore_errors=True)
+
+
+# Persisted solves and sweeps of the projects, shared by every worker process
+artifacts = SolverArtifacts(artifacts_path, Config.SOLVER_ARTIFACTS_PER_PROJECT)
@@ -0,0 +1,100 @@
+# Import necessary modules
+import numpy as np
+from scipy import sparse as sp
+
+# Transition matrices of at least this many states with at most this share of non-zeros are kept sparse
+SPARSE_MIN_STATES = 256
+SPARSE_MAX_DENSITY = 0.1
+
+
+class BeliefModel:
+    """
+    Transition and observation models of update_belief compiled into matrices, to update the beliefs
+    of many transactions at once. Beliefs are (transactions, states) arrays over `states` in order.
+
+    `transition_model[(s, action)][s_prime]` and `observation_model[(action, s_prime)][observation]` are
+    the dict models of update_belief; missing entries are probability 0. Actions and observations that do
+    not appear in the models can still be passed to `update` and have probability 0 as well.
+
+    The decision endpoints don't use it: their transactions have two states (safe or not), whose posterior
+    after one observation is a closed form, and a stream answers each observation before reading the next.
+    """
+
+    def __init__(self, states, transition_model, observation_model, sparse=None):
+        self.states = list(states)
+        self.state_index = {s: i for i, s in enumerate(self.states)}
+
+        actions = {action for (s, action) in transition_model} | {action for (action, s_prime) in observation_model}
+        self.actions = sorted(actions, key=repr)
+        self.action_index = {action: i for i, action in enumerate(self.actions)}
+
+        observations = {observation for probabilities in observation_model.values() for observation in probabilities}
+        self.observations = sorted(observations, key=repr)
+        self.observation_index = {observation: i for i, observation in enumerate(self.observations)}
+
+        # Non-zero transition probabilities as (action, s, s_prime, probability) coordinates, so sparse models
+        # are never allocated densely; one extra action and observation (the last index) have probability 0
+        # everywhere, for unknown ones
+        count = len(self.states)
+        coordinates = np.array([
+            (self.action_index[action], self.state_index[s], self.state_index[s_prime], probability)
+            for (s, action), probabilities in transition_model.items() if s in self.state_index
+            for s_prime, probability in probabilities.items() if s_prime in self.state_index and probability
+        ], dtype=float).reshape(-1, 4)
+        action_rows, rows, columns = coordinates[:, :3].astype(np.int64).T
+        values = coordinates[:, 3]
+        shape = (len(self.actions) + 1, count, count)
+
+        # Observation likelihoods as [action, observation, s_prime], so one observation is a contiguous row
+        self.observation = np.zeros((len(self.actions) + 1, len(self.observations) + 1, count))
+        for (action, s_prime), probabilities in observation_model.items():
+            if s_prime in self.state_index:
+                for observation, probability in probabilities.items():
+                    self.observation[self.action_index[action], self.observation_index[observation], self.state_index[s_prime]] = probability
+
+        if sparse is None:
+            sparse = count >= SPARSE_MIN_STATES and len(values) <= SPARSE_MAX_DENSITY * np.prod(shape)
+        self.sparse = sparse
+        if sparse:
+            # Transition matrices of all actions stacked as one, whose row blocks are sliced per action
+            stacked = sp.csr_matrix((values, (action_rows * count + rows, columns)), shape=(shape[0] * count, count))
+            self.transition = [stacked[action * count:(action + 1) * count] for action in range(shape[0])]
+        else:
+            self.transition = np.zeros(shape)
+            self.transition[action_rows, rows, columns] = values
+
+    def _indices(self, labels, index, count):
+        # Indices of action/observation labels (one label applies to every transaction), unknown ones map to the zero slot
+        if not isinstance(labels, (list, np.ndarray)):
+            return np.full(count, index.get(labels, len(index)), dtype=np.int64)
+        return np.fromiter((index.get(label, len(index)) for label in labels), dtype=np.int64, count=count)
+
+    def update(self, beliefs, actions, observations):
+        """
+        Return the beliefs of every transaction after its `action` and `observation` (labels, one per
+        transaction or one for all). Beliefs are normalized to sum to 1; transactions whose observation
+        has no support (zero evidence) keep their unnormalized, all-zero belief, as in update_belief.
+        """
+        beliefs = np.asarray(beliefs, dtype=float)
+        count = len(beliefs)
+        actions = self._indices(actions, self.action_index, count)
+        observations = self._indices(observations, self.observation_index, count)
+
+        # Prediction through the transition matrix of each transaction's action, one product per action
+        predicted = np.empty_like(beliefs)
+        for action in np.unique(actions):
+            rows = actions == action
+            predicted[rows] = beliefs[rows] @ self.transition[action]
+
+        updated = self.observation[actions, observations] * predicted
+        eta = updated.sum(axis=1, keepdims=True)
+        np.divide(updated, eta, out=updated, where=eta > 0)
+        return updated
+
+    def vector(self, belief):
+        """Return a belief dict {state: probability} as a row over `states`."""
+        return np.array([belief[s] for s in self.states], dtype=float)
+
+    def as_dict(self, vector):
+        """Return a belief row as a dict {state: probability}."""
+        return dict(zip(self.states, vector.tolist()))
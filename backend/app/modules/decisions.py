@@ -0,0 +1,271 @@
+# Import necessary modules from standard library and Flask
+import hashlib
+import json
+import os
+import tempfile
+from flask import Response, jsonify, request, stream_with_context
+
+# Import the application configuration, the solver and the project store
+from config import Config
+from app.modules.algorithm import RESOLUTION, RiskSurface, calculate_cost, generate_p
+from app.modules.graph_model import graph_from_project
+from app.modules.projects import store
+from app.modules.project_index import project_name
+from app.modules.risk_analysis import parse_and_initialize, persisted_project, solve_value_iteration
+from app.modules.solve_cache import SolveCache
+
+
+class DecisionPolicy:
+    """
+    Solved threshold policy of a project for live monitoring of its transactions.
+    The value tables, policy and thresholds are computed once; every decision, risk value and belief
+    update afterwards is a constant-time lookup.
+
+    Beliefs are the probability that the transaction is still safe. At stage k the policy either lets
+    the transaction continue or stops it for correction; an observation is whether the detection
+    raised an alarm at that stage.
+    """
+
+    def __init__(self, p, a, b, thresh, p11, p22, initial_belief):
+        self.p = p
+        self.a = a
+        self.b = b
+        self.thresh = thresh
+        self.p11 = p11
+        self.p22 = p22
+        self.stages = len(p)
+        self.resolution = a.shape[1] + 1
+        self.initial_belief = initial_belief
+        self.surface = RiskSurface(a, p11, p22)
+        # Version of the shared registration the policy was solved from
+        self.registration = None
+
+    def _column(self, x):
+        # Policy column of belief x; column j holds the belief (j + 1) / resolution of the value tables
+        return min(max(int(round(x * self.resolution)) - 1, 0), self.resolution - 2)
+
+    def decide(self, stage, x):
+        """Return the decision and risk of a transaction at `stage` with belief `x`."""
+        if stage >= self.stages:
+            return {"stage": stage, "belief": x, "decision": "done", "risk": 0.0}
+
+        # b holds the stages backwards: row N - 1 - k is the policy of stage k
+        proceed = bool(self.b[self.stages - 1 - stage, self._column(x)])
+        return {
+            "stage": stage,
+            "belief": x,
+            "decision": "continue" if proceed else "stop",
+            "threshold": float(self.thresh[stage]),
+            "risk": float(self.surface.at(x, self.stages - stage))
+        }
+
+    def observe(self, stage, detected):
+        """Return the belief after the observation of `stage`, i.e. the posterior that the stage was safe."""
+        pp = self.p[stage]
+        if detected:
+            return pp * (1 - self.p11) / (pp * (1 - self.p11) + (1 - pp) * self.p22)
+        return pp * self.p11 / (pp * self.p11 + (1 - pp) * (1 - self.p22))
+
+    def to_dict(self):
+        """Return the summary of the policy returned when a project is registered."""
+        return {
+            "stages": self.stages,
+            "resolution": self.resolution,
+            "initialBelief": self.initial_belief,
+            "thresholds": [float(threshold) for threshold in self.thresh],
+            "initial": self.decide(0, self.initial_belief)
+        }
+
+
+def solve_policy(data, resolution=RESOLUTION, project=None):
+    """Solve the base transaction of parsed graph data into a DecisionPolicy, reusing the persisted solves of a stored `project`."""
+    p11 = data["probability_of_rejection"]
+    p22 = data["probability_of_detection"]
+    p = generate_p(data["path_length"], data["probability_of_threat"], data["all_threat_index"])
+    c = calculate_cost(p)
+
+    a, b, thresh = solve_value_iteration(p, c, p11, p22, resolution, persisted_project(project, len(p) * resolution))
+    return DecisionPolicy(p, a, b, thresh, p11, p22, min(0.99, p[0]))
+
+
+def _parse_graph(graph):
+    # Parse a graph {"nodes": [...], "edges": [...]} into the data of its base transaction
+    data, _ = parse_and_initialize({"nodes": graph["nodes"], "edges": graph["edges"], "type": None})
+    return data
+
+
+# Registered policies, by project name; the least recently used ones are dropped beyond the limit
+policies = SolveCache(Config.DECISION_MAX_PROJECTS)
+
+# Directory of the registrations shared by the worker processes of the production server (None keeps them per process)
+registrations = None
+
+
+def share_decisions(path):
+    """Share the projects registered in this worker process through the directory `path`, so every worker can answer their decisions."""
+    global registrations
+    os.makedirs(path, exist_ok=True)
+    registrations = path
+
+
+def _registration_path(name):
+    # Names are arbitrary query parameters, so the files are named after their hash
+    return os.path.join(registrations, hashlib.blake2b(name.encode(), digest_size=16).hexdigest() + ".json")
+
+
+def _share_registration(name, graph, resolution, project, policy):
+    # Publish the registration atomically; renaming keeps the modification time, size and inode that tag the policy
+    descriptor, temp_path = tempfile.mkstemp(dir=registrations, prefix=".", suffix=".tmp")
+    with os.fdopen(descriptor, 'w') as file:
+        json.dump({"name": name, "graph": graph, "resolution": resolution, "project": project}, file)
+        file.flush()
+        stat = os.fstat(file.fileno())
+    os.replace(temp_path, _registration_path(name))
+    policy.registration = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _shared_policy(name, policy):
+    # The registration of `name` may have been added, replaced or dropped by another worker process;
+    # the policy is solved again from it whenever this process holds none or an outdated one
+    try:
+        with open(_registration_path(name)) as file:
+            stat = os.fstat(file.fileno())
+            if policy is not None and policy.registration == (stat.st_mtime_ns, stat.st_size, stat.st_ino):
+                return policy
+            registration = json.load(file)
+    except FileNotFoundError:
+        registration = None
+
+    if registration is None or registration["name"] != name:
+        policies.discard(name)
+        return None
+
+    policy = solve_policy(_parse_graph(registration["graph"]), registration["resolution"], registration["project"])
+    policy.registration = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    policies.put(name, policy)
+    return policy
+
+
+def _registered_policy():
+    # Look up the policy of the `name` query parameter, or return an error response
+    name = request.args.get('name', type=str)
+    if not name:
+        return None, (jsonify({"error": "Name needs to be specified."}), 400)
+
+    policy = policies.get(name)
+    if registrations is not None:
+        policy = _shared_policy(name, policy)
+    if policy is None:
+        return None, (jsonify({"error": "Project is not registered."}), 404)
+    return policy, None
+
+
+def register_project():
+    """
+    Solve a project once and keep its policy for live decisions under the `name` query parameter.
+    The graph is posted as {"nodes": [...], "edges": [...]}, or loaded from the stored project `name` when no body is sent.
+    """
+    name = request.args.get('name', type=str)
+    resolution = request.args.get('resolution', default=RESOLUTION, type=int)
+
+    # Validate the name and resolution
+    if not name:
+        return jsonify({"error": "Name needs to be specified."}), 400
+    if not 4 <= resolution <= Config.MAX_RESOLUTION:
+        return jsonify({"error": f"Resolution needs to be between 4 and {Config.MAX_RESOLUTION}."}), 400
+
+    graph = request.get_json(silent=True)
+    project = None
+    if not graph:
+        project = project_name(name)
+        document = store.load(project)
+        if document is None:
+            return jsonify({"error": "Project file does not exist."}), 404
+        nodes, edges = graph_from_project(document)
+        graph = {"nodes": nodes, "edges": edges}
+
+    try:
+        graph = {"nodes": graph.get("nodes", []), "edges": graph.get("edges", [])}
+        data = _parse_graph(graph)
+    except Exception as e:
+        return jsonify({"error": f"Invalid project graph: {type(e).__name__}: {e}"}), 400
+
+    policy = solve_policy(data, resolution, project)
+
+    if registrations is not None:
+        _share_registration(name, graph, resolution, project, policy)
+    policies.put(name, policy)
+
+    return jsonify(dict(policy.to_dict(), name=name))
+
+
+def unregister_project():
+    """Drop the policy of a registered project."""
+    policy, error = _registered_policy()
+    if error:
+        return error
+
+    policies.discard(request.args['name'])
+    if registrations is not None:
+        try:
+            os.remove(_registration_path(request.args['name']))
+        except FileNotFoundError:
+            pass
+    return jsonify({'message': 'Project unregistered.', 'status': 'success'})
+
+
+def get_decision():
+    """Return the decision and risk of a transaction of a registered project at `stage` with belief `belief`."""
+    policy, error = _registered_policy()
+    if error:
+        return error
+
+    stage = request.args.get('stage', default=0, type=int)
+    belief = request.args.get('belief', default=policy.initial_belief, type=float)
+    if stage < 0 or not 0 <= belief <= 1:
+        return jsonify({"error": "Stage must not be negative and belief must be between 0 and 1."}), 400
+
+    return jsonify(policy.decide(stage, belief))
+
+
+def stream_decisions():
+    """
+    Score live transactions of a registered project from a stream of newline-delimited JSON observations,
+    {"transaction": <id>, "detected": <bool>}, answering each line with the transaction's next decision.
+    A line without "detected" only returns the current decision; "belief" resets the transaction to stage 0 with that belief.
+    """
+    policy, error = _registered_policy()
+    if error:
+        return error
+
+    lines = request.stream
+
+    def generate():
+        transactions = {}
+        for line in lines:
+            if not line.strip():
+                continue
+
+            try:
+                observation = json.loads(line)
+                transaction = observation.get("transaction")
+                if "belief" in observation:
+                    transactions[transaction] = (0, float(observation["belief"]))
+                stage, belief = transactions.get(transaction, (0, policy.initial_belief))
+
+                if "detected" in observation:
+                    if stage >= policy.stages:
+                        raise ValueError("Transaction has already completed every stage.")
+                    stage, belief = stage + 1, policy.observe(stage, bool(observation["detected"]))
+                    transactions[transaction] = (stage, belief)
+
+                result = dict(policy.decide(stage, belief), transaction=transaction)
+            except (ValueError, TypeError, AttributeError) as e:
+                result = {"error": str(e)}
+
+            yield json.dumps(result) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
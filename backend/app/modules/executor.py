@@ -0,0 +1,66 @@
+# Import necessary modules from standard library
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+# Import the application configuration
+from config import Config
+
+# Executor shared by every request, created on first use
+_executor = None
+
+
+def worker_count():
+    """Return the number of workers the configured solver executor runs."""
+    if Config.SOLVER_EXECUTOR == "serial":
+        return 1
+    return Config.SOLVER_WORKERS or os.cpu_count() or 1
+
+
+def get_executor():
+    """Return the configured solver executor, or None when solves run serially."""
+    global _executor
+
+    if _executor is None:
+        if Config.SOLVER_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(max_workers=worker_count())
+        elif Config.SOLVER_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=worker_count())
+        elif Config.SOLVER_EXECUTOR != "serial":
+            raise ValueError(f"Unknown solver executor: {Config.SOLVER_EXECUTOR}")
+
+    return _executor
+
+
+def shutdown_executor():
+    """Stop the solver executor; a new one is created on the next use."""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def map_jobs(function, *iterables):
+    """Run independent jobs on the solver executor and return their results in submission order."""
+    executor = get_executor()
+    if executor is None:
+        return list(map(function, *iterables))
+    return list(executor.map(function, *iterables))
+
+
+def map_batch(function, *arrays):
+    """
+    Split batched arguments into one contiguous chunk per worker, run `function` on every chunk
+    and concatenate the results in the original order.
+    """
+    batch = len(arrays[0])
+    chunks = min(worker_count(), batch)
+    if chunks <= 1:
+        return function(*arrays)
+
+    bounds = np.array_split(np.arange(batch), chunks)
+    chunked = [[array[indices[0]:indices[-1] + 1] for indices in bounds] for array in arrays]
+
+    return np.concatenate(map_jobs(function, *chunked))
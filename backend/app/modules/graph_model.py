@@ -0,0 +1,169 @@
+# Import necessary modules from standard library
+import hashlib
+import json
+
+import numpy as np
+
+# Import the application configuration and the shared cache
+from config import Config
+from app.modules.solve_cache import SolveCache
+
+# Roles of the nodes, from their type and data.nodeType
+ROLE_OTHER = 0
+ROLE_INITIAL = 1
+ROLE_DANGEROUS = 2
+ROLE_THREAT = 3
+ROLE_DETECTION = 4
+
+NODE_ROLES = {
+    ("situation", "initial"): ROLE_INITIAL,
+    ("situation", "dangerous"): ROLE_DANGEROUS,
+    ("event", "threat"): ROLE_THREAT,
+    ("event", "detection"): ROLE_DETECTION
+}
+
+# Edge types moving the transaction from one situation to another
+TRANSITION_TYPES = ("action", "crash")
+
+
+def _csr(rows, columns, size):
+    # Group `columns` by `rows` (0 <= row < size), keeping their order within a row
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, columns[order]
+
+
+class CompiledGraph:
+    """
+    Array form of a posted project graph, built in one pass over its nodes and edges.
+    Nodes are numbered in their posted order; edges are indexed by target and the transitions
+    between situations are kept as CSR adjacency (`indptr`, `indices`).
+    """
+
+    def __init__(self, nodes, edges):
+        count = len(nodes)
+        self.ids = [node['id'] for node in nodes]
+        self.labels = [node['label'] for node in nodes]
+        self.index = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.is_situation = np.zeros(count, dtype=bool)
+        self.roles = np.zeros(count, dtype=np.int8)
+
+        for i, node in enumerate(nodes):
+            self.is_situation[i] = node['type'] == "situation"
+            if node['type'] in ("situation", "event"):
+                self.roles[i] = NODE_ROLES.get((node['type'], node['data']['nodeType']), ROLE_OTHER)
+
+        # Edge endpoints as node numbers (-1 for ids that are not in the graph)
+        self.edge_source = np.array([self.index.get(edge['source'], -1) for edge in edges], dtype=np.int64)
+        self.edge_target = np.array([self.index.get(edge['target'], -1) for edge in edges], dtype=np.int64)
+        is_transition = np.array([edge['type'] in TRANSITION_TYPES for edge in edges], dtype=bool)
+
+        # Incoming edges of every node, in posted order
+        known = np.flatnonzero(self.edge_target >= 0)
+        self.target_indptr, self.target_edges = _csr(self.edge_target[known], known, count)
+
+        # Transitions between situations, without self loops or duplicates
+        transitions = np.flatnonzero(is_transition)
+        source = self.edge_source[transitions]
+        target = self.edge_target[transitions]
+        valid = (source >= 0) & (target >= 0)
+        valid[valid] = self.is_situation[source[valid]] & self.is_situation[target[valid]]
+        if not valid.all():
+            # Transitions have to connect two situations
+            edge = edges[transitions[np.argmin(valid)]]
+            raise KeyError(edge['target'] if self._is_situation_id(edge['source']) else edge['source'])
+
+        loops = source == target
+        pairs = np.unique(source[~loops] * count + target[~loops])
+        self.indptr, self.indices = _csr(pairs // max(count, 1), pairs % max(count, 1), count)
+        self.reverse_indptr, self.reverse_indices = _csr(pairs % max(count, 1), pairs // max(count, 1), count)
+
+        # Probabilities of the edges leading into threat and detection events, by event label
+        self.threat_probability = {}
+        self.detection_probability = {}
+        for i in self.nodes_with_role(ROLE_THREAT):
+            for e in self.incoming(i):
+                self.threat_probability[self.labels[i]] = float(edges[e]['data']['probability'])
+        for i in self.nodes_with_role(ROLE_DETECTION):
+            for e in self.incoming(i):
+                self.detection_probability[self.labels[i]] = dict(
+                    detection = float(edges[e]['data']['probability']),
+                    rejection = float(edges[e]['data']['secondaryProbability']))
+
+    def _is_situation_id(self, node_id):
+        return node_id in self.index and self.is_situation[self.index[node_id]]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nodes_with_role(self, role):
+        """Return the numbers of the nodes with `role`, in posted order."""
+        return np.flatnonzero(self.roles == role)
+
+    def incoming(self, i):
+        """Return the numbers of the edges leading into node `i`."""
+        return self.target_edges[self.target_indptr[i]:self.target_indptr[i + 1]]
+
+    def successors(self, i):
+        """Return the situations reachable from situation `i` in one transition."""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def predecessors(self, i):
+        """Return the situations leading to situation `i` in one transition."""
+        return self.reverse_indices[self.reverse_indptr[i]:self.reverse_indptr[i + 1]]
+
+    def situation_name(self, i):
+        """Return the display name "label (id)" of node `i`."""
+        return f"{self.labels[i]} ({self.ids[i]})"
+
+
+def graph_from_project(document):
+    """
+    Return the (nodes, edges) the editor posts for a stored project document
+    with 'situations', 'events' and 'relationships'.
+    """
+    nodes = [
+        {
+            "id": f"{node_type}_{item['id']}",
+            "label": item['name'],
+            "type": node_type,
+            "data": {"id": item['id'], "label": item['name'], "nodeType": item['type']}
+        }
+        for node_type, collection in (("situation", "situations"), ("event", "events"))
+        for item in document.get(collection, [])
+    ]
+
+    edges = []
+    for relationship in document.get('relationships', []):
+        source = f"{relationship['sourceType']}_{relationship['sourceId']}"
+        target = f"{relationship['targetType']}_{relationship['targetId']}"
+        edges.append({
+            "id": f"{source}:{target}:{relationship['type']}",
+            "source": source,
+            "target": target,
+            "type": relationship['type'],
+            "data": {
+                "id": relationship['id'],
+                "label": relationship.get('name'),
+                "probability": relationship.get('probability'),
+                "secondaryProbability": relationship.get('secondaryProbability')
+            }
+        })
+
+    return nodes, edges
+
+
+def content_key(content):
+    """Return a hash of raw request content (bytes)."""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def graph_key(nodes, edges):
+    """Return a content hash of a graph's nodes and edges."""
+    content = json.dumps([nodes, edges], separators=(",", ":"), ensure_ascii=False)
+    return content_key(content.encode("utf-8"))
+
+
+# Parsed graphs of recent requests, keyed by graph_key, so repeated analyses skip parsing
+graph_cache = SolveCache(Config.GRAPH_CACHE_SIZE)
@@ -0,0 +1,92 @@
+# Import necessary modules from standard library and Flask
+import gzip
+import hashlib
+from flask import Response, current_app, request
+
+# Import the application configuration and the LRU cache
+from config import Config
+from app.modules.solve_cache import SolveCache
+
+# Brotli is optional; without it responses are only gzip-compressed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Serialized read responses, keyed on the resource and tagged with its content version
+response_cache = SolveCache(Config.RESPONSE_CACHE_SIZE)
+
+
+def _negotiate_encoding(size):
+    """Return the content encoding to use for a body of `size` bytes, or None to send it as is."""
+    if size < Config.COMPRESSION_MIN_SIZE:
+        return None
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def cached_json_response(key, version, load):
+    """
+    Return the JSON response of resource `key` at content `version`, where `load()` returns its data.
+    The serialized body, its strong ETag and its compressed variants are reused until the version changes,
+    and requests whose If-None-Match matches are answered with 304 Not Modified.
+    """
+    entry = response_cache.get(key)
+    if entry is None or entry['version'] != version:
+        body = current_app.json.dumps(load()).encode()
+        entry = {
+            'version': version,
+            'body': body,
+            'etag': hashlib.sha256(body).hexdigest()[:32],
+            'encoded': {}
+        }
+        response_cache.put(key, entry)
+
+    # Every encoding is a different representation, so it gets its own strong ETag
+    encoding = _negotiate_encoding(len(entry['body']))
+    etag = f"{entry['etag']}-{encoding}" if encoding else entry['etag']
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = entry['body']
+        if encoding:
+            if encoding not in entry['encoded']:
+                entry['encoded'][encoding] = _compress(body, encoding)
+            body = entry['encoded'][encoding]
+
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    # Clients may keep the response but have to revalidate it before every use
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def compress_response(response):
+    """Compress large responses (project lists, risk matrices) for clients accepting gzip or brotli."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    encoding = _negotiate_encoding(response.content_length or 0)
+    if encoding:
+        response.set_data(_compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+
+    return response
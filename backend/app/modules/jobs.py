@@ -0,0 +1,300 @@
+# Import necessary modules from standard library and Flask
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from flask import jsonify, request
+
+# Import the application configuration and the risk analysis
+from config import Config
+from app.modules.risk_analysis import (
+    analysis_project, check_analysis_options, parse_analysis_options, parse_and_initialize, run_risk_analysis
+)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been cancelled."""
+
+
+class JobLimitError(Exception):
+    """Raised when a user already has the maximum number of active jobs."""
+
+
+class Job:
+    """A risk analysis running in the background, with its progress and (partial) result."""
+
+    def __init__(self, owner):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.status = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def report(self, fraction, result):
+        """Record progress and partial results; stops the job if it was cancelled."""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        self.progress = fraction
+        self.result = dict(result)
+
+    def to_dict(self):
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error
+        }
+
+    def state(self):
+        """Return the job as published to the other worker processes."""
+        return dict(self.to_dict(), owner=self.owner, created=self.created, finished=self.finished, pid=os.getpid())
+
+    @classmethod
+    def from_state(cls, state):
+        """Return a job published by another worker process; it is run and cancelled by that process."""
+        job = cls(state["owner"])
+        job.id = state["jobId"]
+        job.status = state["status"]
+        job.progress = state["progress"]
+        job.result = state["result"]
+        job.error = state["error"]
+        job.created = state["created"]
+        job.finished = state["finished"]
+        return job
+
+
+def _write_state(path, state):
+    # Replace the published state of a job atomically, so readers never see a partially written one
+    temp_path = os.path.join(path, f".{state['jobId']}.json.tmp")
+    with open(temp_path, 'w') as file:
+        json.dump(state, file)
+    os.replace(temp_path, os.path.join(path, f"{state['jobId']}.json"))
+
+
+def _published_states(path):
+    # Yield the file path and state of every job published to `path`, skipping those removed meanwhile
+    for name in os.listdir(path):
+        if name.startswith('.') or not name.endswith('.json'):
+            continue
+        file_path = os.path.join(path, name)
+        try:
+            with open(file_path) as file:
+                yield file_path, json.load(file)
+        except FileNotFoundError:
+            continue
+
+
+class JobQueue:
+    """
+    Bounded pool of local worker threads running jobs, without any external broker.
+    Each owner may only have `per_owner_limit` queued or running jobs; finished jobs are kept
+    for `retention` seconds so their results can be collected.
+
+    With a `path`, the state of every job is also published as a file to that directory, shared by the
+    worker processes of the production server, so any of them can report on or cancel it.
+    """
+
+    def __init__(self, max_workers=2, per_owner_limit=2, retention=600, path=None):
+        self.per_owner_limit = per_owner_limit
+        self.retention = retention
+        self.path = path
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="risk-job")
+
+    def _purge(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished is not None and now - job.finished > self.retention:
+                del self._jobs[job_id]
+
+    def _publish(self, job):
+        if self.path is not None:
+            _write_state(self.path, job.state())
+
+    def _published(self):
+        # Jobs of every worker process; those finished longer than the retention ago are removed
+        jobs = []
+        for file_path, state in _published_states(self.path):
+            if state["finished"] is not None and time.time() - state["finished"] > self.retention:
+                for stale_path in (file_path, file_path[:-len('.json')] + '.cancel'):
+                    try:
+                        os.remove(stale_path)
+                    except FileNotFoundError:
+                        pass
+            else:
+                jobs.append(Job.from_state(state))
+        return jobs
+
+    def _check_cancelled(self, job):
+        # Other worker processes cancel a job through a marker file next to its state
+        if self.path is not None and os.path.exists(os.path.join(self.path, f"{job.id}.cancel")):
+            job._cancelled.set()
+        return job._cancelled.is_set()
+
+    def _report(self, job, fraction, result):
+        self._check_cancelled(job)
+        job.report(fraction, result)
+        self._publish(job)
+
+    def submit(self, owner, function, *args):
+        """Queue `function(*args, progress=job.report)` and return its job."""
+        with self._lock:
+            self._purge()
+            # Shared jobs are counted over every worker process; two of them submitting at the same time may both pass
+            jobs = self._jobs.values() if self.path is None else self._published()
+            active = sum(1 for job in jobs if job.owner == owner and job.active)
+            if active >= self.per_owner_limit:
+                raise JobLimitError(f"At most {self.per_owner_limit} analyses can run at the same time.")
+
+            job = Job(owner)
+            self._jobs[job.id] = job
+            self._publish(job)
+            job.future = self._executor.submit(self._run, job, function, args)
+
+        return job
+
+    def _run(self, job, function, args):
+        # Cancelled after a worker thread picked the job up, when its future can no longer be cancelled
+        if self._check_cancelled(job):
+            job.status = "cancelled"
+            job.finished = time.time()
+            self._publish(job)
+            return
+
+        job.status = "running"
+        self._publish(job)
+        try:
+            job.result = function(*args, progress=partial(self._report, job))
+            job.progress = 1.0
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+            self._publish(job)
+
+    def get(self, job_id):
+        """Return the job `job_id`, or None if it does not exist (anymore)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or self.path is None or not job_id.isalnum():
+            return job
+
+        # A job of another worker process
+        try:
+            with open(os.path.join(self.path, f"{job_id}.json")) as file:
+                return Job.from_state(json.load(file))
+        except FileNotFoundError:
+            return None
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job; running jobs stop at their next progress report.
+        Jobs of another worker process stop when they start or next report progress.
+        """
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return job
+
+        if job.future is None:
+            open(os.path.join(self.path, f"{job.id}.cancel"), 'a').close()
+            return job
+
+        job._cancelled.set()
+        if job.future.cancel():
+            job.status = "cancelled"
+            job.finished = time.time()
+            self._publish(job)
+        return job
+
+
+# Background risk analyses of this process
+job_queue = JobQueue(Config.JOB_WORKERS, Config.JOB_LIMIT_PER_USER, Config.JOB_RETENTION)
+
+
+def share_jobs(path):
+    """Publish the jobs of this worker process to the directory `path`, where every worker can look them up."""
+    os.makedirs(path, exist_ok=True)
+    job_queue.path = path
+
+
+def retire_jobs(path, pid):
+    """Fail the queued or running jobs that the exited worker process `pid` published to `path`."""
+    for _, state in _published_states(path):
+        if state["pid"] == pid and state["status"] in ("queued", "running"):
+            state.update(status="failed", error="The worker process running the analysis exited.", finished=time.time())
+            _write_state(path, state)
+
+
+def _request_owner():
+    # There are no user accounts, so users are told apart by an optional header or their address
+    return request.headers.get('X-User-Id') or request.remote_addr
+
+
+def submit_risk_analysis():
+    """Queue a risk analysis of the posted graph and return its job id."""
+    try:
+        resolution, adaptive, error = parse_analysis_options()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    data, risk_type = parse_and_initialize()
+    try:
+        check_analysis_options([risk_type], adaptive)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        job = job_queue.submit(_request_owner(), partial(run_risk_analysis, project=analysis_project(), error=error), data,
+                               risk_type, resolution, adaptive, Config.STREAM_CHUNK_SIZE)
+    except JobLimitError as e:
+        return jsonify({"error": str(e)}), 429
+
+    return jsonify(job.to_dict()), 202
+
+
+def get_risk_analysis_job():
+    """Return the status, progress and (partial) result of a risk analysis job."""
+    job_id = request.args.get('jobId', type=str)
+
+    # Validate presence of the job id in the request
+    if not job_id:
+        return jsonify({"error": "Job id needs to be specified."}), 400
+
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job does not exist."}), 404
+
+    return jsonify(job.to_dict())
+
+
+def cancel_risk_analysis_job():
+    """Cancel a queued or running risk analysis job."""
+    job_id = request.args.get('jobId', type=str)
+
+    # Validate presence of the job id in the request
+    if not job_id:
+        return jsonify({"error": "Job id needs to be specified."}), 400
+
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job does not exist."}), 404
+
+    return jsonify(job.to_dict())
@@ -0,0 +1,77 @@
+# Import necessary modules from standard library
+import math
+
+import numpy as np
+
+# Import the application configuration
+from config import Config
+
+# Numba is optional; without it the solver keeps using the NumPy implementation
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _backup_stage(previous, values, policy, pp, cc, p11, p22, resolution):
+    # Same arithmetic, in the same order, as algorithm.bellman_backup for one transaction
+    p21 = 1 - p11
+    p12 = 1 - p22
+
+    g1 = pp * p21 / (pp * p21 + (1 - pp) * p22)
+    g2 = pp * p11 / (pp * p11 + (1 - pp) * p12)
+    f1 = pp * p21 + (1 - pp) * p22
+    f2 = pp * p11 + (1 - pp) * p12
+
+    g1_floor = min(int(math.floor(g1 * resolution)), resolution - 2)
+    g1_ceil = min(int(math.ceil(g1 * resolution)), resolution - 2)
+    g2_floor = min(int(math.floor(g2 * resolution)), resolution - 2)
+    g2_ceil = min(int(math.ceil(g2 * resolution)), resolution - 2)
+
+    v1 = previous[g1_floor] + (g1 * resolution - g1_floor) * (previous[g1_ceil] - previous[g1_floor])
+    v2 = previous[g2_floor] + (g2 * resolution - g2_floor) * (previous[g2_ceil] - previous[g2_floor])
+
+    vcorr = -cc + f1 * v1 + f2 * v2
+    for j in range(resolution - 1):
+        x = (j + 1) / resolution
+        vemp = f1 * x * v1 + f2 * x * v2
+
+        policy[j] = vemp >= vcorr
+        values[j] = vemp if policy[j] else vcorr
+
+
+def _bellman_backup(previous, pp, cc, p11, p22):
+    resolution = previous.shape[1] + 1
+    values = np.empty(previous.shape)
+    policy = np.empty(previous.shape, dtype=np.bool_)
+
+    for k in range(previous.shape[0]):
+        _backup_stage(previous[k], values[k], policy[k], pp[k], cc[k], p11[k], p22[k], resolution)
+
+    return values, policy
+
+
+def _value_iteration(p, c, p11, p22, resolution):
+    batch, N = p.shape
+    a = np.empty((batch, N + 1, resolution - 1))
+    b = np.empty((batch, N, resolution - 1), dtype=np.bool_)
+
+    # Every stage of every transaction runs inside the kernel, without temporaries
+    for k in range(batch):
+        a[k, 0, :] = 1.0
+        for i in range(1, N + 1):
+            _backup_stage(a[k, i - 1], a[k, i], b[k, i - 1], p[k, N - i], c[k, N - i], p11[k], p22[k], resolution)
+
+    return a, b
+
+
+# Backend of the solver, selected once at import time ("numba" or "numpy")
+if njit is not None and Config.SOLVER_BACKEND in ("auto", "numba"):
+    BACKEND = "numba"
+    _backup_stage = njit(cache=True)(_backup_stage)
+    bellman_backup = njit(cache=True)(_bellman_backup)
+    value_iteration = njit(cache=True)(_value_iteration)
+else:
+    BACKEND = "numpy"
+    bellman_backup = None
+    value_iteration = None
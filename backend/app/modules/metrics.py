@@ -0,0 +1,375 @@
+# Import necessary modules from standard library and Flask
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from flask import Response, g, has_request_context, request
+
+# File locks are only available on POSIX systems, which the preforking production server needs anyway
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Import the application configuration and the caches reported as metrics
+from config import Config
+from app.modules.algorithm import quantile_cache
+from app.modules.graph_model import graph_cache
+from app.modules.http_cache import response_cache
+from app.modules.solve_cache import solve_cache
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the belief grid size histogram buckets
+GRID_BUCKETS = (50, 100, 250, 500, 1000, 2000, 5000)
+
+# Caches whose hit rates are exported
+CACHES = {"solve": solve_cache, "graph": graph_cache, "quantile": quantile_cache, "response": response_cache}
+
+METRIC_HELP = {
+    "cydra_requests_total": ("counter", "Handled requests by endpoint and status code."),
+    "cydra_request_duration_seconds": ("histogram", "Request latency by endpoint."),
+    "cydra_analysis_duration_seconds": ("histogram", "Risk analysis latency by analysis type."),
+    "cydra_stage_duration_seconds": ("histogram", "Duration of the stages of a request."),
+    "cydra_solves_total": ("counter", "Transactions solved by value iteration (solve cache misses)."),
+    "cydra_solve_grid_size": ("histogram", "Belief grid resolution of the solved transactions.")
+}
+
+# Structured timing log of every request, one JSON object per line
+timing_log = logging.getLogger("cydra.timing")
+if Config.TIMING_LOG:
+    timing_log.setLevel(logging.INFO)
+    timing_log.addHandler(logging.StreamHandler())
+
+
+class Histogram:
+    """Cumulative Prometheus histogram over fixed bucket bounds."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value, count=1):
+        self.counts[bisect.bisect_left(self.buckets, value)] += count
+        self.sum += value * count
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms of this process, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=(), buckets=LATENCY_BUCKETS, count=1):
+        with self._lock:
+            key = (name, labels)
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(buckets)
+            self._histograms[key].observe(value, count)
+
+    def snapshot(self):
+        """Return the counters, histograms and cache statistics of this process as JSON-serializable data."""
+        with self._lock:
+            counters = [[name, labels, value] for (name, labels), value in self._counters.items()]
+            histograms = [
+                [name, labels, histogram.buckets, list(histogram.counts), histogram.sum]
+                for (name, labels), histogram in self._histograms.items()
+            ]
+        caches = {cache: {field: stats[field] for field in ("hits", "misses", "size")}
+                  for cache, stats in ((cache, CACHES[cache].stats()) for cache in CACHES)}
+        return {"counters": counters, "histograms": histograms, "caches": caches}
+
+    def render(self):
+        """Return every metric, and the statistics of the caches, in the Prometheus text format."""
+        return render_snapshots([self.snapshot()])
+
+
+def _merge(snapshots):
+    # Sum the counters, histograms and cache statistics of several snapshots
+    counters, histograms, caches = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+
+        for name, labels, buckets, counts, total in snapshot["histograms"]:
+            key = (name, tuple(tuple(label) for label in labels))
+            if key not in histograms:
+                histograms[key] = Histogram(tuple(buckets))
+            histogram = histograms[key]
+            histogram.counts = [merged + count for merged, count in zip(histogram.counts, counts)]
+            histogram.sum += total
+
+        for cache, stats in snapshot["caches"].items():
+            merged = caches.setdefault(cache, {"hits": 0, "misses": 0, "size": 0})
+            for field in merged:
+                merged[field] += stats[field]
+
+    for stats in caches.values():
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+
+    return counters, histograms, caches
+
+
+def render_snapshots(snapshots):
+    """Return the sum of the metrics snapshots of one or more processes in the Prometheus text format."""
+    counters, histograms, caches = _merge(snapshots)
+
+    lines = []
+    for name, (kind, description) in METRIC_HELP.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_labels(labels)} {value}")
+        for (metric, labels), histogram in sorted(histograms.items(), key=lambda item: item[0]):
+            if metric == name:
+                lines += _histogram_lines(name, labels, histogram)
+
+    for name, description, field in (
+        ("cydra_cache_hits_total", "Cache lookups that found an entry.", "hits"),
+        ("cydra_cache_misses_total", "Cache lookups that found no entry.", "misses"),
+        ("cydra_cache_hit_ratio", "Share of cache lookups that found an entry.", "hit_rate"),
+        ("cydra_cache_entries", "Entries currently held by the cache.", "size")
+    ):
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        for cache, stats in caches.items():
+            lines.append(f"{name}{_labels((('cache', cache),))} {stats[field]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _as_snapshot(counters, histograms, caches):
+    # Merged counters, histograms and cache statistics in the format of MetricsRegistry.snapshot
+    return {
+        "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+        "histograms": [
+            [name, labels, histogram.buckets, histogram.counts, histogram.sum]
+            for (name, labels), histogram in histograms.items()
+        ],
+        "caches": {cache: {field: stats[field] for field in ("hits", "misses", "size")} for cache, stats in caches.items()}
+    }
+
+
+# Snapshot holding the summed counters of the worker processes that exited
+RETIRED_FILE = "retired.json"
+
+
+class SharedMetrics:
+    """
+    Metrics of the worker processes of a preforking server, kept as one JSON snapshot file per process
+    in a directory they share. When a worker exits, its counters and histograms are folded into one
+    snapshot of the retired workers and its file is removed, so the summed counters never go backwards
+    while the cache size gauges only cover the live workers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._published = None
+        self._lock = threading.Lock()
+
+    def publish(self, snapshot):
+        """Write the snapshot of this process, unless it did not change since the last one."""
+        text = json.dumps(snapshot)
+        with self._lock:
+            if text == self._published:
+                return
+            temp_path = os.path.join(self.path, f".{os.getpid()}.json.tmp")
+            with open(temp_path, "w") as file:
+                file.write(text)
+            os.replace(temp_path, os.path.join(self.path, f"{os.getpid()}.json"))
+            self._published = text
+
+    @contextmanager
+    def _locked(self, exclusive):
+        # Hold the lock of the directory, shared by readers and exclusive while a worker is retired
+        if fcntl is None:
+            yield
+            return
+
+        with open(os.path.join(self.path, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _load(self, name):
+        try:
+            with open(os.path.join(self.path, name)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, name, snapshot):
+        temp_path = os.path.join(self.path, f".{name}.tmp")
+        with open(temp_path, "w") as file:
+            json.dump(snapshot, file)
+        os.replace(temp_path, os.path.join(self.path, name))
+
+    def read(self):
+        """Return the snapshots of every live process and the snapshot of the retired ones."""
+        with self._locked(exclusive=False):
+            snapshots = (self._load(name) for name in os.listdir(self.path) if name.endswith(".json"))
+            return [snapshot for snapshot in snapshots if snapshot is not None]
+
+    def retire(self, pid):
+        """Fold the counters and histograms of the exited worker `pid` into the retired snapshot and drop its file."""
+        with self._locked(exclusive=True):
+            snapshot = self._load(f"{pid}.json")
+            if snapshot is None:
+                return
+
+            retired = self._load(RETIRED_FILE)
+            counters, histograms, caches = _merge([snapshot] if retired is None else [retired, snapshot])
+            # Caches of exited workers hold no entries anymore
+            for stats in caches.values():
+                stats["size"] = 0
+            self._write(RETIRED_FILE, _as_snapshot(counters, histograms, caches))
+            os.remove(os.path.join(self.path, f"{pid}.json"))
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def _histogram_lines(name, labels, histogram):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+    lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return lines
+
+
+# Metrics of this process
+registry = MetricsRegistry()
+
+# Snapshots of every worker process, when this process is one of the workers of a preforking server
+shared = None
+
+
+def share_metrics(path, interval):
+    """
+    Publish the metrics of this worker process to the directory `path` every `interval` seconds,
+    and report the sum over every worker publishing there from /api/metrics.
+    """
+    global shared
+    shared = SharedMetrics(path)
+
+    def publish_periodically():
+        while True:
+            time.sleep(interval)
+            publish_metrics()
+
+    threading.Thread(target=publish_periodically, name="metrics-publisher", daemon=True).start()
+
+
+def publish_metrics():
+    """Write the current metrics of this process to the shared directory, if metrics are shared."""
+    if shared is not None:
+        shared.publish(registry.snapshot())
+
+
+class _Stage:
+    # Times a block and adds it to the stages of the current request and the stage histogram
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        record_stage(self.name, time.perf_counter() - self.start)
+
+
+_disabled = nullcontext()
+
+
+def stage(name):
+    """Return a context manager timing the stage `name`; does nothing when metrics are disabled."""
+    return _Stage(name) if Config.METRICS_ENABLED else _disabled
+
+
+def record_stage(name, seconds):
+    """Add `seconds` spent in stage `name` to the current request (if any) and the stage histogram."""
+    if not Config.METRICS_ENABLED:
+        return
+
+    registry.observe("cydra_stage_duration_seconds", seconds, (("stage", name),))
+    if has_request_context() and "stage_timings" in g:
+        total, count = g.stage_timings.get(name, (0.0, 0))
+        g.stage_timings[name] = (total + seconds, count + 1)
+
+
+def record_solves(count, resolution):
+    """Count `count` transactions solved by value iteration on a grid of `resolution` points."""
+    if Config.METRICS_ENABLED and count:
+        registry.inc("cydra_solves_total", amount=count)
+        registry.observe("cydra_solve_grid_size", resolution, buckets=GRID_BUCKETS, count=count)
+
+
+def record_analysis(risk_type, seconds):
+    """Add the duration of a complete risk analysis of `risk_type`."""
+    if Config.METRICS_ENABLED:
+        registry.observe("cydra_analysis_duration_seconds", seconds, (("type", risk_type),))
+
+
+def start_request_timer():
+    """Start timing the current request (before_request)."""
+    g.request_start = time.perf_counter()
+    g.stage_timings = {}
+
+
+def finish_request_timer(response):
+    """Record the current request, add its Server-Timing header (unless streamed) and write its timing log (after_request)."""
+    if "request_start" not in g:
+        return response
+
+    duration = time.perf_counter() - g.request_start
+    endpoint = request.endpoint or "unmatched"
+    registry.inc("cydra_requests_total", (("endpoint", endpoint), ("status", str(response.status_code))))
+    registry.observe("cydra_request_duration_seconds", duration, (("endpoint", endpoint),))
+
+    # Streamed responses send their headers before the stream is generated, when only the stages up to
+    # the first byte are known; their later stages still reach the stage histograms
+    if not response.is_streamed:
+        timings = [f"{name};dur={total * 1000:.2f}" for name, (total, count) in g.stage_timings.items()]
+        response.headers["Server-Timing"] = ", ".join(timings + [f"total;dur={duration * 1000:.2f}"])
+
+    if timing_log.isEnabledFor(logging.INFO):
+        timing_log.info(json.dumps({
+            "endpoint": endpoint,
+            "method": request.method,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "stages": {name: {"duration_ms": round(total * 1000, 3), "count": count}
+                       for name, (total, count) in g.stage_timings.items()}
+        }))
+
+    return response
+
+
+def get_metrics():
+    """Return the metrics in the Prometheus text format, summed over every worker process when they are shared."""
+    if shared is None:
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    publish_metrics()
+    return Response(render_snapshots(shared.read()), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,72 @@
+# Collections of a project document that can be patched, holding items identified by their 'id'
+PATCHABLE_COLLECTIONS = ('situations', 'events', 'relationships')
+
+
+class PatchError(ValueError):
+    """Raised when a patch operation can't be applied to a project document."""
+
+
+class VersionConflictError(Exception):
+    """Raised when a patch was made against an older version of the project."""
+
+    def __init__(self, version):
+        super().__init__(f"Project is at version {version}.")
+        self.version = version
+
+
+def _parse_path(path):
+    # Paths address an item by collection and id, e.g. "/situations/3"
+    parts = path.split('/') if isinstance(path, str) else []
+    if len(parts) != 3 or parts[0] != '' or parts[1] not in PATCHABLE_COLLECTIONS or not parts[2]:
+        raise PatchError(f"Invalid path '{path}', expected /<situations|events|relationships>/<id>.")
+    return parts[1], parts[2]
+
+
+def apply_patch(document, operations):
+    """
+    Apply JSON-Patch-style operations to the node/edge collections of a project document, in place.
+    Every operation is {"op": "add" | "replace" | "remove", "path": "/<collection>/<id>", "value": {...}}
+    where items are addressed by their 'id' rather than their position.
+    """
+    if not isinstance(operations, list):
+        raise PatchError("Operations need to be a list.")
+
+    # Positions of the items of every collection by id, built when a collection is first patched
+    positions = {}
+
+    for operation in operations:
+        op = operation.get('op') if isinstance(operation, dict) else None
+        if op not in ('add', 'replace', 'remove'):
+            raise PatchError(f"Unsupported patch operation: {op}")
+
+        collection, item_id = _parse_path(operation.get('path'))
+        items = document.setdefault(collection, [])
+        if collection not in positions:
+            positions[collection] = {str(item.get('id')): index for index, item in enumerate(items)}
+        index = positions[collection].get(item_id)
+
+        if op == 'add' and index is not None:
+            raise PatchError(f"Item {operation['path']} already exists.")
+        if op in ('replace', 'remove') and index is None:
+            raise PatchError(f"Item {operation['path']} does not exist.")
+        if op in ('add', 'replace') and not isinstance(operation.get('value'), dict):
+            raise PatchError(f"Operation on {operation['path']} needs an object value.")
+        # The id of an item can't be changed, and would otherwise no longer match the paths addressing it
+        if op in ('add', 'replace') and str(operation['value'].get('id')) != item_id:
+            raise PatchError(f"Value of {operation['path']} needs the id '{item_id}'.")
+
+        if op == 'add':
+            positions[collection][item_id] = len(items)
+            items.append(operation['value'])
+        elif op == 'replace':
+            items[index] = operation['value']
+        else:
+            # Leave a hole so the positions of the other items stay valid
+            items[index] = None
+            del positions[collection][item_id]
+
+    # Drop the holes left by removed items, keeping the order of the others
+    for collection in positions:
+        document[collection] = [item for item in document[collection] if item is not None]
+
+    return document
@@ -0,0 +1,118 @@
+# Import necessary modules from standard library
+import os
+import threading
+import time
+from datetime import datetime
+
+# Import the application configuration
+from config import Config
+
+
+class ProjectCatalog:
+    """
+    In-memory index of the project JSON files of a directory.
+    The directory is scanned once and then only re-scanned when its modification time changes,
+    or every `rescan_interval` seconds to pick up files edited in place by other processes.
+    """
+
+    def __init__(self, path, check_interval=2.0, rescan_interval=300.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.rescan_interval = rescan_interval
+
+        self._projects = {}
+        self._sorted = None
+        self._version = None
+        self._checked = float("-inf")
+        self._scanned = float("-inf")
+        self._lock = threading.Lock()
+
+    def _entry(self, name, mtime):
+        return {
+            'name': name,
+            'last_saved': datetime.fromtimestamp(mtime).isoformat(),
+            'mtime': mtime
+        }
+
+    def _scan(self):
+        projects = {}
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                # Ensure the file is a JSON before processing
+                if entry.name.endswith('.json') and entry.is_file():
+                    name = entry.name[:-len('.json')]
+                    projects[name] = self._entry(name, entry.stat().st_mtime)
+        return projects
+
+    def refresh(self, force=False):
+        """Re-scan the directory if it changed since the last scan (checked at most every `check_interval` seconds)."""
+        now = time.monotonic()
+
+        with self._lock:
+            if not force and now - self._checked < self.check_interval:
+                return
+            self._checked = now
+
+            version = os.stat(self.path).st_mtime_ns
+            if force or version != self._version or now - self._scanned > self.rescan_interval:
+                self._projects = self._scan()
+                self._sorted = None
+                self._version = version
+                self._scanned = now
+
+    def version(self):
+        """Return the directory modification time; taken right before a write, it is passed to touch or remove."""
+        return os.stat(self.path).st_mtime_ns
+
+    def _adopt_version(self, before):
+        # Writes of this process change the directory modification time too; they are already applied to the
+        # index, so the new time is adopted, but only if the directory was the one last scanned right before
+        # the write. Otherwise another process changed it and the next refresh has to rescan.
+        if before == self._version:
+            self._version = self.version()
+
+    def touch(self, name, before=None):
+        """Record that the project `name` was written by this process, with the directory at version `before` before the write."""
+        file_path = os.path.join(self.path, f"{name}.json")
+
+        with self._lock:
+            self._projects[name] = self._entry(name, os.path.getmtime(file_path))
+            self._sorted = None
+            self._adopt_version(before)
+
+    def remove(self, name, before=None):
+        """Record that the project `name` was deleted by this process, with the directory at version `before` before the delete."""
+        with self._lock:
+            if self._projects.pop(name, None) is not None:
+                self._sorted = None
+            self._adopt_version(before)
+
+    def query(self, prefix="", sort="last_saved", descending=True, offset=0, limit=None):
+        """Return the total number of matching projects and the requested page of them."""
+        self.refresh()
+
+        with self._lock:
+            if self._sorted is None or self._sorted[0] != (sort, descending):
+                key = (lambda project: project['mtime']) if sort == "last_saved" else (lambda project: project['name'])
+                self._sorted = ((sort, descending), sorted(self._projects.values(), key=key, reverse=descending))
+            projects = self._sorted[1]
+
+        if prefix:
+            projects = [project for project in projects if project['name'].startswith(prefix)]
+
+        end = None if limit is None else offset + limit
+        page = [{'name': project['name'], 'last_saved': project['last_saved']} for project in projects[offset:end]]
+
+        return len(projects), page
+
+
+def project_name(file_name):
+    """Return the project name of a project file name, with or without the .json extension."""
+    return file_name[:-len('.json')] if file_name.endswith('.json') else file_name
+
+
+def create_catalog(path):
+    """Build the project catalog of `path` using the configured check intervals."""
+    catalog = ProjectCatalog(path, Config.PROJECT_INDEX_CHECK_INTERVAL, Config.PROJECT_INDEX_RESCAN_INTERVAL)
+    catalog.refresh(force=True)
+    return catalog
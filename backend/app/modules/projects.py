@@ -1,28 +1,43 @@
 # Import necessary modules from standard library and Flask
-import os, json
-from datetime import datetime
 from flask import request, jsonify
 
 # Import necessary paths from app utilities
-from app.utils import projects_path
+from app.utils import projects_path, database_path
+from app.modules.project_index import project_name
+from app.modules.patches import apply_patch, PatchError, VersionConflictError
+from app.modules.storage import create_store
+from app.modules.http_cache import cached_json_response
+from app.modules.metrics import stage
+from app.modules.artifacts import artifacts
+
+# Project storage backend, selected by Config.PROJECT_STORE
+store = create_store(projects_path, database_path)
 
 def get_all_projects():
-    """Retrieve and return all projects from the projects directory as JSON."""
-    projects = []
-    
-    # Traverse the projects directory to find and process all JSON files
-    for file_name in os.listdir(projects_path):
-        # Ensure the file is a JSON before processing
-        if file_name.endswith('.json'):
-            file_path = os.path.join(projects_path, file_name)
-            last_modified = datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-            projects.append({
-                'name': file_name.replace('.json', ''),
-                'last_saved': last_modified
-            })
+    """
+    Retrieve and return the projects from the project store as JSON.
+    Supports name-prefix filtering, sorting and pagination through the query parameters;
+    the total number of matching projects is returned in the X-Total-Count header.
+    """
+    prefix = request.args.get('prefix', default='', type=str)
+    sort = request.args.get('sort', default='last_saved', type=str)
+    order = request.args.get('order', default='desc', type=str)
+    offset = request.args.get('offset', default=0, type=int)
+    limit = request.args.get('limit', default=None, type=int)
+
+    # Validate the sorting and pagination parameters
+    if sort not in ('last_saved', 'name') or order not in ('asc', 'desc'):
+        return jsonify({"error": "Sort must be 'last_saved' or 'name' and order 'asc' or 'desc'."}), 400
+    if offset < 0 or (limit is not None and limit < 0):
+        return jsonify({"error": "Offset and limit must not be negative."}), 400
+
+    with stage("store"):
+        total, projects = store.list(prefix, sort, order == 'desc', offset, limit)
     
     # Return the projects data in JSON format
-    return jsonify(projects)
+    response = jsonify(projects)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 
 def get_project():
@@ -33,23 +48,26 @@ def get_project():
     if not filename:
         return jsonify({"error": "Filename needs to be specified."}), 400
 
-    file_path = os.path.join(projects_path, f"{filename}")
+    name = project_name(filename)
+    with stage("store"):
+        version = store.version(name)
     
-    # Check if the file exists; create if it doesn't
-    if not os.path.exists(file_path):
-        with open(file_path, 'w') as file:
-            json.dump({
+        # Check if the project exists; create it if it doesn't
+        if version is None:
+            store.save(name, {
                 'situations': [],
                 'events': [],
                 'relationships': [],
                 'simulated_path': []
-            }, file, indent=2)
+            })
+            version = store.version(name)
 
-    # Load and return the existing data
-    with open(file_path) as file:
-        data = json.load(file)
+    def load():
+        with stage("store"):
+            return store.load(name)
     
-    return jsonify(data)
+    # Serve the cached response until the project is saved again, answering revalidations with 304
+    return cached_json_response(('project', name), version, load)
 
 
 def update_project():
@@ -60,40 +78,83 @@ def update_project():
     if not filename:
         return jsonify({"error": "Filename needs to be specified."}), 400
 
-    file_path = os.path.join(projects_path, f"{filename}")
+    new_data = request.get_json()
+
+    def keep_simulated_path(existing_data):
+        # Update the simulated path if it exists
+        new_data['simulated_path'] = existing_data.get('simulated_path', [])
+        new_data['version'] = existing_data.get('version', 0) + 1
+        return new_data
     
     # Attempt to update the project data
     try:
-        with open(file_path, 'r+') as file:
-            existing_data = json.load(file)
-            # Update the simulated path if it exists
-            new_data = request.get_json()
-            new_data['simulated_path'] = existing_data.get('simulated_path', [])
-            
-            file.seek(0)
-            file.truncate()
-            json.dump(new_data, file, indent=2)
+        with stage("store"):
+            store.update(project_name(filename), keep_simulated_path)
+            artifacts.invalidate(project_name(filename))
         
-        return jsonify({'message': 'Project updated successfully!', 'status': 'success'})
+        return jsonify({'message': 'Project updated successfully!', 'status': 'success', 'version': new_data['version']})
     except Exception as e:
         return jsonify({'message': 'Error updating project: {}'.format(e), 'status': 'error'})
 
 
-def delete_project():
-    """Delete a project file based on filename from the query parameters."""
+def patch_project():
+    """
+    Apply node/edge operations to a project, as {"baseVersion": <int>, "operations": [...]}.
+    The patch is rejected with 409 when the project changed since `baseVersion`.
+    """
     filename = request.args.get('filename', type=str)
     
     # Validate the filename presence
     if not filename:
         return jsonify({"error": "Filename needs to be specified."}), 400
 
-    file_path = os.path.join(projects_path, f"{filename}.json")
-    
-    # Attempt to delete the file
+    patch = request.get_json(silent=True) or {}
+    base_version = patch.get('baseVersion')
+    if not isinstance(base_version, int):
+        return jsonify({"error": "Base version needs to be specified."}), 400
+
+    patched = {}
+
+    def apply_operations(existing_data):
+        # Reject patches made against an older version of the project
+        version = existing_data.get('version', 0)
+        if version != base_version:
+            raise VersionConflictError(version)
+
+        apply_patch(existing_data, patch.get('operations'))
+        existing_data['version'] = patched['version'] = version + 1
+        return existing_data
+
+    # Attempt to patch the project data
     try:
-        os.remove(file_path)
-        return jsonify({'message': 'Project deleted successfully.', 'status': 'success'})
+        with stage("store"):
+            store.update(project_name(filename), apply_operations)
+            artifacts.invalidate(project_name(filename))
+
+        return jsonify({'message': 'Project patched successfully!', 'status': 'success', 'version': patched['version']})
     except FileNotFoundError:
         return jsonify({"error": "Project file does not exist."}), 404
+    except VersionConflictError as e:
+        return jsonify({"error": str(e), "version": e.version}), 409
+    except PatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+def delete_project():
+    """Delete a project based on filename from the query parameters."""
+    filename = request.args.get('filename', type=str)
+    
+    # Validate the filename presence
+    if not filename:
+        return jsonify({"error": "Filename needs to be specified."}), 400
+
+    # Attempt to delete the project
+    try:
+        with stage("store"):
+            deleted = store.delete(project_name(filename))
+            artifacts.invalidate(project_name(filename))
+        if not deleted:
+            return jsonify({"error": "Project file does not exist."}), 404
+        return jsonify({'message': 'Project deleted successfully.', 'status': 'success'})
     except OSError as e:
         return jsonify({"error": f"Failed to delete project: {e}"}), 500
@@ -0,0 +1,118 @@
+# Import necessary modules from standard library
+import heapq
+
+import numpy as np
+
+
+def _neighbours(indptr, indices, frontier):
+    # All CSR neighbours of the nodes in `frontier`, concatenated
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return indices[offsets + np.arange(offsets.size)]
+
+
+def _levels(indptr, indices, sources, blocked=()):
+    # Breadth-first search from `sources` over CSR adjacency, never entering the `blocked` nodes;
+    # -1 marks unreachable nodes
+    distance = np.full(len(indptr) - 1, -1, dtype=np.int64)
+    distance[np.asarray(blocked, dtype=np.int64)] = -2
+    frontier = np.unique(np.asarray(sources, dtype=np.int64))
+    distance[frontier] = 0
+
+    level = 0
+    while frontier.size:
+        level += 1
+        reached = _neighbours(indptr, indices, frontier)
+        frontier = np.unique(reached[distance[reached] == -1])
+        distance[frontier] = level
+
+    distance[distance == -2] = -1
+    return distance
+
+
+def distances_from(graph, start):
+    """Return the number of transitions from situation `start` to every node (-1 if unreachable)."""
+    return _levels(graph.indptr, graph.indices, [start])
+
+
+def distances_to(graph, targets, blocked=()):
+    """
+    Return the number of transitions from every node to the closest of `targets` (-1 if none is reachable),
+    on paths that pass no other target and none of the `blocked` nodes.
+    """
+    return _levels(graph.reverse_indptr, graph.reverse_indices, targets, blocked)
+
+
+def path_length(graph, start, threats):
+    """
+    Return [path_length, threat_level] like a level-by-level search from `start`: the number of levels
+    reachable from `start`, and the level of every reachable threat node by situation name.
+    """
+    distance = distances_from(graph, start)
+    threats = np.asarray(threats, dtype=np.int64)
+    reached = threats[distance[threats] >= 0]
+
+    threat_level = {
+        graph.situation_name(i): int(distance[i])
+        for i in reached[np.argsort(distance[reached], kind="stable")]
+    }
+    return [int(distance.max()) + 1, threat_level]
+
+
+def k_shortest_paths(graph, start, targets, k):
+    """
+    Return up to `k` shortest simple paths (arrays of node numbers) from `start` to any of `targets`,
+    shortest first, each ending at the first target it reaches. Uses Yen's algorithm: every further path
+    branches off a path found before, with its shortest continuation found by one breadth-first search
+    that avoids the branch's prefix. That bounds the work to O(k * path length * (nodes + edges)).
+    """
+    if k <= 0 or distances_to(graph, targets)[start] < 0:
+        return []
+    if start in set(np.asarray(targets).tolist()):
+        return [np.array([start], dtype=np.int64)]
+
+    paths = [_shortest_continuation(graph, [start], targets, set())]
+    found = {tuple(paths[0])}
+    candidates = []
+    order = 0
+    while len(paths) < k:
+        last = paths[-1]
+        for i in range(len(last) - 1):
+            root = last[:i + 1]
+            # Transitions out of the branch node taken by the paths already found with the same prefix
+            taken = {path[i + 1] for path in paths if path[:i + 1] == root}
+            path = _shortest_continuation(graph, root, targets, taken)
+            if path is not None and tuple(path) not in found:
+                found.add(tuple(path))
+                order += 1
+                heapq.heappush(candidates, (len(path), order, path))
+
+        if not candidates:
+            break
+        paths.append(heapq.heappop(candidates)[2])
+
+    return [np.array(path, dtype=np.int64) for path in paths]
+
+
+def _shortest_continuation(graph, root, targets, taken):
+    # Shortest path extending `root` to a target without revisiting it or taking the transitions to `taken`
+    distance = distances_to(graph, targets, blocked=root)
+    choices = [int(node) for node in graph.successors(root[-1]) if node not in taken and distance[node] >= 0]
+    if not choices:
+        return None
+
+    path = root + [min(choices, key=lambda node: (distance[node], node))]
+    while distance[path[-1]] > 0:
+        path.append(int(next(node for node in graph.successors(path[-1]) if distance[node] == distance[path[-1]] - 1)))
+    return path
+
+
+def path_threat_index(graph, path, threats):
+    """
+    Return [path_length, threat_level] of a single path, in the shape generate_p consumes:
+    the number of situations on it and the position of every threat node by situation name.
+    """
+    is_threat = np.isin(path, threats)
+    threat_level = {graph.situation_name(i): int(position) for position, i in zip(np.flatnonzero(is_threat), path[is_threat])}
+    return [len(path), threat_level]
@@ -1,111 +1,201 @@
 import statistics
+import time
 import numpy as np
 
-from flask import jsonify, request
+from functools import partial
+from flask import Response, json, jsonify, request, stream_with_context
+from config import Config
 from app.modules.algorithm import (
     calculate_cost,
     value_iteration,
-    calculate_risk,
-    find_path_length,
+    value_iteration_batch,
+    IncrementalSolver,
+    RESOLUTION,
+    estimate_risk,
+    risk_at,
     generate_p
 )
+from app.modules import reachability
+from app.modules.executor import map_jobs, map_batch, worker_count
+from app.modules.metrics import stage, record_stage, record_solves, record_analysis
+from app.modules.graph_model import CompiledGraph, ROLE_INITIAL, ROLE_DANGEROUS, graph_cache, graph_key, content_key
+from app.modules.solve_cache import solve_cache, solve_key, freeze
+from app.modules.artifacts import artifacts
+from app.modules.project_index import project_name
+
+# Analysis types computed on top of the base risk
+ANALYSIS_TYPES = ("risk_vs_attack", "risk_vs_fp_fn", "risk_vs_length", "visualize_node_near_threat", "risk_per_path")
+
+# Sweep parameters of the analyses
+ATTACK_VALUES = np.arange(0.01, 1, 0.1)
+P12_VALUES = np.array([0.01, 0.10, 0.20, 0.30, 0.40, 0.50])
+P21_VALUES = np.array([0.01, 0.10, 0.20, 0.30, 0.40, 0.50])
+LENGTH_STEPS = 6
+INSERTION_LENGTH = 12
+
+# Media types of the streamed risk analysis formats
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
 
 # Some constants
 PROBABILITY_OF_THREAT_THRESHOLD = 0.09
 THRESHOLD = 0.0001
 GAMMA = 0.95
 
-def parse_and_initialize():
-    """
-    1. Parse the JSON from the request,
-    2. Build dictionaries and gather essential info,
-    3. Return the data needed for further risk calculations.
-    """
-    nodes, edges, type = request.get_json().values()
-
-    # Build dictionary {situation_id: "label (id)"}
-    situation_names = {
-        node['id']: f"{node['label']} ({node['id']})"
-        for node in nodes
-        if node['type'] == "situation"
-    }
+def initialize_graph(nodes, edges):
+    """Compile a posted graph and gather the essential info of its risk analyses."""
+    graph = CompiledGraph(nodes, edges)
 
     # Calculate average threat probability (from events with nodeType='threat')
-    all_threat_probability = {
-        node['label']: float(edge['data']['probability'])
-            for node in nodes
-            if node['type'] == 'event' and node['data']['nodeType'] == 'threat'
-        for edge in edges
-        if edge['target'] == node['id']
-    }
-    probability_of_threat = statistics.mean(all_threat_probability.values())
+    probability_of_threat = statistics.mean(graph.threat_probability.values())
 
     # Calculate average detection probability (from events with nodeType='detection')
-    all_detection_probability = {
-        node['label']: dict(
-            detection = float(edge['data']['probability']), 
-             rejection = float(edge['data']['secondaryProbability']))
-            for node in nodes
-            if node['type'] == 'event' and node['data']['nodeType'] == 'detection'
-        for edge in edges
-        if edge['target'] == node['id']
-    }
+    all_detection_probability = graph.detection_probability
     probability_of_detection = statistics.mean([probability["detection"] for probability in  all_detection_probability.values()])
     probability_of_rejection = statistics.mean([probability["rejection"] for probability in  all_detection_probability.values()])
 
-    # Build possible transitions (paths) between situations
-    all_paths = {}
-    for edge in edges:
-        if edge['type'] in ["action", "crash"]:
-            source_name = situation_names[edge['source']]
-            target_name = situation_names[edge['target']]
-            # Ignore self loops
-            if source_name == target_name:
-                continue
-            all_paths.setdefault(source_name, set()).add(target_name)
-
     # Identify start/danger nodes
-    start_node = next(
-        situation_names[node['id']]
-        for node in nodes
-        if node['type'] == "situation" and node['data']['nodeType'] == "initial"
-    )
-    
-    threat_node = [
-        situation_names[node['id']]
-        for node in nodes
-        if node['type'] == "situation" and node['data']['nodeType'] == "dangerous"
-    ]
-    
-    threat_node_labels = [
-        node['label']
-        for node in nodes
-        if node['type'] == "situation" and node['data']['nodeType'] == "dangerous"
-    ]
+    start_index = graph.nodes_with_role(ROLE_INITIAL)[0]
+    start_node = graph.situation_name(start_index)
+    threat_index = graph.nodes_with_role(ROLE_DANGEROUS)
+    threat_node = [graph.situation_name(i) for i in threat_index]
+    threat_node_labels = [graph.labels[i] for i in threat_index]
 
     # Compute path length and threat indexes
-    path_length, all_threat_index = find_path_length(all_paths, start_node, threat_node)
+    path_length, all_threat_index = reachability.path_length(graph, start_index, threat_index)
 
     # Return all the essential data so we don't re-parse everything each time
     return {
         "nodes": nodes,
         "edges": edges,
+        "graph": graph,
         "probability_of_threat": probability_of_threat,
         "probability_of_detection": probability_of_detection,
         "probability_of_rejection": probability_of_rejection,
-        "all_paths": all_paths,
         "start_node": start_node,
         "threat_node": threat_node,  # possibly multiple
         "threat_node_labels": threat_node_labels,
         "path_length": path_length,
         "all_threat_index": all_threat_index
-    }, type
+    }
 
 
-def compute_base_risk(probability_of_threat, probability_of_detection, probability_of_rejection, path_length, all_threat_index):
+def parse_and_initialize(payload=None):
+    """
+    1. Parse the JSON from the request (or the given `payload`),
+    2. Compile the graph and gather essential info, or reuse them for a graph seen before,
+    3. Return the data needed for further risk calculations.
+    """
+    with stage("parse"):
+        return _parse_and_initialize(payload)
+
+
+def _parse_and_initialize(payload):
+    nodes, edges, type = (payload if payload is not None else request.get_json()).values()
+
+    # Identical request bodies are looked up by a hash of the raw body, which is much cheaper
+    # than hashing the decoded graph; that is only needed when the body is new, e.g. for another analysis type
+    body_key = content_key(request.get_data()) if payload is None else None
+    data = graph_cache.get(body_key) if body_key else None
+    if data is None:
+        data = graph_cache.get_or_compute(graph_key(nodes, edges), lambda: initialize_graph(nodes, edges))
+        if body_key:
+            graph_cache.put(body_key, data)
+
+    return dict(data), type
+
+
+def solve_value_iteration(p, c, p11, p22, resolution=RESOLUTION, project=None):
+    """
+    Return the value iteration of a transaction, reusing a cached solve of the same inputs.
+    The solves of a `project` (see persisted_project) are also persisted and memory-mapped by later requests and processes.
+    """
+    key = solve_key(p, c, p11, p22, resolution)
+    persist = project is not None
+
+    def solve():
+        if persist:
+            with stage("artifacts"):
+                tables = artifacts.load(project, key)
+            if tables is not None:
+                return tables
+
+        with stage("solve"):
+            record_solves(1, resolution)
+            tables = freeze(*value_iteration(p, c, p11, p22, resolution))
+
+        if persist:
+            with stage("artifacts"):
+                artifacts.save(project, key, *tables)
+        return tables
+
+    return solve_cache.get_or_compute(key, solve)
+
+
+def solve_risk_batch(p, c, p11, p22, specific_x, resolution=RESOLUTION):
+    """
+    Solve a batch of same-length transactions with one batched value iteration.
+    Every argument holds one entry per transaction; returns one risk value per transaction.
+    Transactions already in the solve cache are not solved again.
+    """
+    keys = [solve_key(*inputs, resolution) for inputs in zip(p, c, p11, p22)]
+    tables = [solve_cache.get(key) for key in keys]
+
+    missing = [k for k, table in enumerate(tables) if table is None]
+    if missing:
+        with stage("solve"):
+            record_solves(len(missing), resolution)
+            a, b, thresh = value_iteration_batch(
+                [p[k] for k in missing], [c[k] for k in missing],
+                [p11[k] for k in missing], [p22[k] for k in missing], resolution
+            )
+        for n, k in enumerate(missing):
+            tables[k] = freeze(a[n].copy(), b[n].copy(), thresh[n])
+            solve_cache.put(keys[k], tables[k])
+
+    return np.array([risk_at(table[0], x, p11[k], p22[k]) for k, (table, x) in enumerate(zip(tables, specific_x))])
+
+
+def iter_risk_sweep(p, p11, p22, specific_x, resolution=RESOLUTION):
+    """
+    Solve a sequence of related transactions, such as a length sweep, with one incremental solver.
+    Stages the transactions share are only computed once; yields the risk value of each transaction
+    as soon as it is solved.
+    """
+    solver = IncrementalSolver(p11, p22, resolution)
+
+    def solve(p_sweep, c):
+        with stage("solve"):
+            record_solves(1, resolution)
+            return freeze(*solver.solve(p_sweep, c))
+
+    for p_sweep, x in zip(p, specific_x):
+        c = calculate_cost(p_sweep)
+        a, b, thresh = solve_cache.get_or_compute(
+            solve_key(p_sweep, c, p11, p22, resolution),
+            lambda: solve(p_sweep, c)
+        )
+        yield risk_at(a, x, p11, p22)
+
+
+def solve_risk_sweep(p, p11, p22, specific_x, resolution=RESOLUTION):
+    """Return the risk values of iter_risk_sweep as a list."""
+    return list(iter_risk_sweep(p, p11, p22, specific_x, resolution))
+
+
+def _iter_batches(solve, size, chunk):
+    # Solve the points of a sweep in batches of `chunk` (all at once by default) and yield them in order
+    chunk = chunk or size
+    for start in range(0, size, chunk):
+        yield from solve(slice(start, start + chunk))
+
+
+def compute_base_risk(probability_of_threat, probability_of_detection, probability_of_rejection, path_length, all_threat_index,
+                      resolution=RESOLUTION, adaptive=False, project=None, error=False):
     """
     2. Compute risk analysis with the base probability of threat and detection.
-       Returns a dict with 'riskValue' and any other needed details.
+       Returns a dict with 'riskValue', the estimated interpolation error 'riskError'
+       of the belief grid (None unless `error` is set), and any other needed details.
+       The solves of a `project` are persisted with it (see solve_value_iteration).
     """
     # For demonstration, we’ll set p11 and p22 as in your example
     p11 = probability_of_rejection
@@ -113,133 +203,138 @@ def compute_base_risk(probability_of_threat, probability_of_detection, probabili
 
     # Generate transition probabilities
     p = generate_p(path_length, probability_of_threat, all_threat_index)
-    c = calculate_cost(p)
-
-    # Solve via value iteration
-    a, b, thresh = value_iteration(p, c, p11, p22)
-    risk = calculate_risk(a, p, p11, p22)
+    with stage("cost"):
+        c = calculate_cost(p)
 
     specific_x = min(0.99, p[0])
-    x_index = int(specific_x * 1000)
-    graph_risk = risk[-1, x_index]
+
+    if adaptive:
+        graph_risk, risk_error = estimate_risk(p, c, p11, p22, specific_x, resolution, adaptive=True, error=error)
+    else:
+        # Solve via value iteration, and on request again at half the resolution to estimate the grid error
+        a, b, thresh = solve_value_iteration(p, c, p11, p22, resolution, project)
+        graph_risk = risk_at(a, specific_x, p11, p22)
+
+        risk_error = None
+        if error:
+            a, b, thresh = solve_value_iteration(p, c, p11, p22, resolution // 2, project)
+            risk_error = abs(graph_risk - risk_at(a, specific_x, p11, p22))
 
     return {
         "baseRisk": graph_risk,
+        "riskError": risk_error,
         "p11": p11,
         "p22": p22
     }
 
 
-def compute_risk_vs_attack(probability_of_detection, probability_of_rejection, path_length, all_threat_index):
+def iter_risk_vs_attack(probability_of_detection, probability_of_rejection, path_length, all_threat_index, resolution=RESOLUTION,
+                       chunk=None):
     """
-    3. Risk vs. Attack Probability: vary PA from 0.01 to <1 in 0.1 increments
-       Return a list of { 'PA': <>, 'Risk': <> } for each step.
+    3. Risk vs. Attack Probability: vary PA from 0.01 to <1 in 0.1 increments.
+       Yield { 'PA': <>, 'Risk': <> } for each step, solving `chunk` attack probabilities
+       per batch (all of them by default); the batches are split across the solver executor.
     """
     p11 = probability_of_rejection
     p22 = probability_of_detection
 
-    risk_attack = []
-    for PA in np.arange(0.01, 1, 0.1):
-        p = generate_p(path_length, PA, all_threat_index)
-        c = calculate_cost(p)
-        a, b, thresh = value_iteration(p, c, p11, p22)
-        risk_array = calculate_risk(a, p, p11, p22)
+    p = [generate_p(path_length, PA, all_threat_index) for PA in ATTACK_VALUES]
+    c = [calculate_cost(p_attack) for p_attack in p]
 
-        specific_x = min(0.99, p[0])
-        x_index = int(specific_x * 1000)
-        risk_for_x = risk_array[-1, x_index]
+    # Every attack probability has the same transaction length, so all of them
+    # are solved together in batches
+    specific_x = [min(0.99, p_attack[0]) for p_attack in p]
 
-        risk_attack.append({
-            "PA": float(f"{PA:.2f}"),  # just to keep it nice
-            "Risk": risk_for_x
-        })
+    def solve(points):
+        batch = len(p[points])
+        risk_values = map_batch(
+            partial(solve_risk_batch, resolution=resolution),
+            p[points], c[points], [p11] * batch, [p22] * batch, specific_x[points]
+        )
+        for PA, risk_for_x in zip(ATTACK_VALUES[points], risk_values):
+            yield {
+                "PA": float(f"{PA:.2f}"),  # just to keep it nice
+                "Risk": risk_for_x
+            }
 
-    return risk_attack
+    yield from _iter_batches(solve, len(p), chunk)
 
 
-def compute_risk_vs_false_neg_pos(probability_of_threat, path_length, all_threat_index):
+def iter_risk_vs_false_neg_pos(probability_of_threat, path_length, all_threat_index, resolution=RESOLUTION, chunk=None):
     """
     4. Risk vs. false-negative (p12) and false-positive (p21) rates.
-       Return { 'p12Values': [...], 'p21Values': [...], 'riskMatrix': 2D list }
+       Yield { 'row': <p12 index>, 'column': <p21 index>, 'p12': <>, 'p21': <>, 'Risk': <> } for each cell
+       of the risk matrix, solving `chunk` cells per batch (all of them by default); the batches are split
+       across the solver executor.
     """
     # Use a simplified p (without forced transitions?) as in your code
     p = generate_p(path_length, probability_of_threat, all_threat_index, perfect_condition=False)
     c = calculate_cost(p)
 
-    # Example sets of p12/p21
-    p12_values = np.array([0.01, 0.10, 0.20, 0.30, 0.40, 0.50])
-    p21_values = np.array([0.01, 0.10, 0.20, 0.30, 0.40, 0.50])
-
     specific_x = min(0.99, p[0])
-    x_index = int(specific_x * 1000)
-
-    risk_matrix = np.zeros((len(p12_values), len(p21_values)))
-    for i, p21 in enumerate(p21_values):
-        for j, p12 in enumerate(p12_values):
-            a, b, thresh = value_iteration(p, c, p11=(1 - p12), p22=(1 - p21))
-            risk_array = calculate_risk(a, p, p11=(1 - p12), p22=(1 - p21))
-            risk_value = risk_array[-1, x_index]
-            risk_matrix[j, i] = risk_value
-
-    return {
-        "p12Values": p12_values.tolist(),
-        "p21Values": p21_values.tolist(),
-        "riskMatrix": risk_matrix.tolist()
-    }
-
 
-def compute_risk_vs_length(path_length, probability_of_threat, probability_of_detection, probability_of_rejection, all_threat_index):
+    # Solve every (p12, p21) pair of the grid in batches, p12 varying fastest
+    columns, rows = np.meshgrid(np.arange(len(P21_VALUES)), np.arange(len(P12_VALUES)), indexing="ij")
+    columns = columns.ravel()
+    rows = rows.ravel()
+    p11 = 1 - P12_VALUES[rows]
+    p22 = 1 - P21_VALUES[columns]
+
+    def solve(cells):
+        batch = len(p11[cells])
+        risk_values = map_batch(
+            partial(solve_risk_batch, resolution=resolution),
+            [p] * batch, [c] * batch, p11[cells], p22[cells], [specific_x] * batch
+        )
+        for row, column, risk_value in zip(rows[cells], columns[cells], risk_values):
+            yield {
+                "row": int(row),
+                "column": int(column),
+                "p12": float(P12_VALUES[row]),
+                "p21": float(P21_VALUES[column]),
+                "Risk": risk_value
+            }
+
+    yield from _iter_batches(solve, len(p11), chunk)
+
+
+def iter_risk_vs_length(path_length, probability_of_threat, probability_of_detection, probability_of_rejection, all_threat_index,
+                        resolution=RESOLUTION):
     """
     5. Risk vs. length of transaction: vary path length and compute risk each time.
-       Return a list of { 'P_Length': <>, 'Risk': <> }.
+       Yield { 'P_Length': <>, 'Risk': <> } for each length as soon as it is solved. The lengths share
+       most of their stages, so they are solved as one incremental chain rather than spread across the executor.
     """
     p11 = probability_of_rejection
     p22 = probability_of_detection
 
 
-    results = []
     # Example: vary path length from min_index+3 to path_length+4
     # Adjust as needed.
-    for p_len in range(path_length, path_length + 6):
-        p = generate_p(p_len, probability_of_threat, all_threat_index, False)
-        c = calculate_cost(p)
-        
-        a, b, thresh = value_iteration(p, c, p11, p22)
-        risk_array = calculate_risk(a, p, p11, p22)
-        
-        specific_x = min(0.99, p[0])
-        x_index = int(specific_x * 1000)
-        risk_for_x = risk_array[-1, x_index]
-
-        results.append({
+    lengths = list(range(path_length, path_length + LENGTH_STEPS))
+    p = [generate_p(p_len, probability_of_threat, all_threat_index, False) for p_len in lengths]
+    specific_x = [min(0.99, p_length[0]) for p_length in p]
+
+    # The lengths share most of their stages, so they are solved incrementally
+    risk_values = iter_risk_sweep(p, p11, p22, specific_x, resolution)
+
+    for p_len, risk_for_x in zip(lengths, risk_values):
+        yield {
             "P_Length": p_len,
             "Risk": risk_for_x
-        })
-
-    return results
+        }
 
 
-def visualize_node_near_threat(p, N, calculate_cost, value_iteration, calculate_risk, p11, p22):
-    lengths_insert_before = []
-    risk_values_insert_before = []
-    lengths_insert_end = []
-    risk_values_insert_end = []
- 
+def _insertion_sequences(p, N):
+    # p vectors of both insertion curves, from len(p) up to N steps
     p_before = p.copy()
     p_end = p.copy()
+    all_p_before = []
+    all_p_end = []
  
     for length in range(len(p), N + 1):
- 
-        c_before = calculate_cost(p_before)
-        a_before, b_before, thresh_before = value_iteration(p_before, c_before, p11, p22)
-        risk_before = calculate_risk(a_before, p_before, p11, p22)
- 
-        specific_x = p_before[0]
-        x_index = int(specific_x * 1000)
-        risk_for_x_before = risk_before[-1, x_index]
- 
-        lengths_insert_before.append(len(p_before))
-        risk_values_insert_before.append(risk_for_x_before)
+        all_p_before.append(p_before.copy())
+        all_p_end.append(p_end.copy())
  
         # Add a safe element before the first threat
         for i in range(len(p_before)):
@@ -249,26 +344,79 @@ def visualize_node_near_threat(p, N, calculate_cost, value_iteration, calculate_
         else:
             p_before.append(0.99)
  
-        # Compute risk for inserting at the end
-        c_end = calculate_cost(p_end)
-        a_end, b_end, thresh_end = value_iteration(p_end, c_end, p11, p22)
-        risk_end = calculate_risk(a_end, p_end, p11, p22)
- 
-        specific_x = p_end[0]
-        x_index = int(specific_x * 1000)
-        risk_for_x_end = risk_end[-1, x_index]
- 
-        lengths_insert_end.append(len(p_end))
-        risk_values_insert_end.append(risk_for_x_end)
- 
+        # Add a safe element at the end
         p_end.append(0.99)
- 
-    return {
-        "lengths_insert_before": lengths_insert_before,
-        "risk_values_insert_before": risk_values_insert_before,
-        "lengths_insert_end": lengths_insert_end,
-        "risk_values_insert_end": risk_values_insert_end
-    }
+
+    return all_p_before, all_p_end
+
+
+def iter_node_near_threat(p, N, p11, p22, resolution=RESOLUTION):
+    """
+    6. Risk when a safe node is inserted before the first threat, or at the end, up to N steps.
+       Yield { 'curve': 'insert_before' | 'insert_end', 'length': <>, 'Risk': <> } alternating between both curves.
+       Each curve is solved incrementally; with a parallel solver executor both curves are solved at the
+       same time and their points yielded once both are done, otherwise every point as soon as it is solved.
+    """
+    all_p_before, all_p_end = _insertion_sequences(p, N)
+    x_before = [p_length[0] for p_length in all_p_before]
+    x_end = [p_length[0] for p_length in all_p_end]
+
+    if worker_count() > 1:
+        risk_before, risk_end = map_jobs(
+            solve_risk_sweep, [all_p_before, all_p_end], [p11, p11], [p22, p22], [x_before, x_end], [resolution, resolution]
+        )
+    else:
+        risk_before = iter_risk_sweep(all_p_before, p11, p22, x_before, resolution)
+        risk_end = iter_risk_sweep(all_p_end, p11, p22, x_end, resolution)
+
+    for p_before, risk_for_before, p_end, risk_for_end in zip(all_p_before, risk_before, all_p_end, risk_end):
+        yield {"curve": "insert_before", "length": len(p_before), "Risk": risk_for_before}
+        yield {"curve": "insert_end", "length": len(p_end), "Risk": risk_for_end}
+
+
+def threat_paths(graph, k):
+    """Return the `k` shortest paths (arrays of node numbers) from the initial situation of `graph` to a dangerous one."""
+    start = graph.nodes_with_role(ROLE_INITIAL)[0]
+    return reachability.k_shortest_paths(graph, start, graph.nodes_with_role(ROLE_DANGEROUS), k)
+
+
+def iter_risk_per_path(graph, paths, probability_of_threat, probability_of_detection, probability_of_rejection,
+                       resolution=RESOLUTION):
+    """
+    7. Risk of each of the shortest paths from the initial situation to a dangerous one.
+       Yield { 'path': [<situation labels>], 'length': <>, 'Risk': <> } for every path of threat_paths, shortest first.
+       Each path is solved with its own p vector; paths of the same length are solved in one batch.
+    """
+    p11 = probability_of_rejection
+    p22 = probability_of_detection
+    threats = graph.nodes_with_role(ROLE_DANGEROUS)
+
+    p = []
+    for path in paths:
+        length, threat_level = reachability.path_threat_index(graph, path, threats)
+        p.append(generate_p(length, probability_of_threat, threat_level))
+
+    # Paths come shortest first, so the paths of one length follow each other
+    start = 0
+    while start < len(paths):
+        end = start + 1
+        while end < len(paths) and len(paths[end]) == len(paths[start]):
+            end += 1
+
+        batch = end - start
+        risk_values = map_batch(
+            partial(solve_risk_batch, resolution=resolution),
+            p[start:end], [calculate_cost(p_path) for p_path in p[start:end]],
+            [p11] * batch, [p22] * batch, [min(0.99, p_path[0]) for p_path in p[start:end]]
+        )
+        for path, risk_for_path in zip(paths[start:end], risk_values):
+            yield {
+                "path": [graph.labels[i] for i in path],
+                "length": len(path),
+                "Risk": risk_for_path
+            }
+        start = end
+
 
 def create_human_readable_list(items):
     """
@@ -291,50 +439,379 @@ def create_human_readable_list(items):
     return ", ".join(items[:-1]) + f", and {items[-1]}"
 
 
-def get_risk_analysis():
-    # 1. Parse JSON and set up
-    data, risk_type = parse_and_initialize()
+def _flag(value):
+    return value.lower() in ("1", "true")
+
+
+def parse_analysis_options():
+    """
+    Read the belief grid options of a risk analysis request from its query parameters: the resolution,
+    the adaptive grid (base risk only) and whether to estimate the grid error with a second solve.
+    Coarse grids trade precision for speed in previews; raises ValueError for invalid options.
+    """
+    resolution = request.args.get('resolution', default=RESOLUTION, type=int)
+    adaptive = request.args.get('adaptive', default=False, type=_flag)
+    error = request.args.get('error', default=False, type=_flag)
+    if not 4 <= resolution <= Config.MAX_RESOLUTION:
+        raise ValueError(f"Resolution needs to be between 4 and {Config.MAX_RESOLUTION}.")
+
+    return resolution, adaptive, error
+
+
+def check_analysis_options(risk_types, adaptive):
+    """Raise ValueError when the adaptive grid is requested for sweeps, which are always solved on the uniform grid."""
+    sweeps = [risk_type for risk_type in risk_types if risk_type in ANALYSIS_TYPES]
+    if adaptive and sweeps:
+        raise ValueError(f"The adaptive grid only applies to the base risk, not to {', '.join(sweeps)}.")
+
+
+def analysis_project():
+    """Return the name of the stored project a risk analysis request is for (?filename), or None."""
+    filename = request.args.get('filename', type=str)
+    return project_name(filename) if filename else None
+
+
+def persisted_project(project, cells):
+    """
+    Return the stored `project` an analysis of `cells` stages x belief grid points, summed over all of its
+    transactions, persists its solves to, or None when persisting is off or the analysis is too small to be worth it.
+    """
+    if project and Config.SOLVER_ARTIFACTS and cells >= Config.SOLVER_ARTIFACTS_MIN_CELLS:
+        return project
+    return None
+
+
+def _analysis_cells(risk_type, path_length, paths, resolution, error):
+    # Stages x belief grid points of every transaction the base risk and the `risk_type` sweep solve
+    cells = path_length * resolution + (path_length * (resolution // 2) if error else 0)
+    if risk_type == "risk_vs_attack":
+        stages = len(ATTACK_VALUES) * path_length
+    elif risk_type == "risk_vs_fp_fn":
+        stages = len(P12_VALUES) * len(P21_VALUES) * path_length
+    elif risk_type == "risk_vs_length":
+        stages = sum(range(path_length, path_length + LENGTH_STEPS))
+    elif risk_type == "visualize_node_near_threat":
+        stages = 2 * sum(range(path_length, INSERTION_LENGTH + 1))
+    elif risk_type == "risk_per_path":
+        stages = sum(len(path) for path in paths)
+    else:
+        stages = 0
+    return cells + stages * resolution
+
+
+def _sweep_key(data, risk_type, paths, resolution):
+    # Content hash of everything the points of the `risk_type` sweep depend on
+    content = json.dumps([
+        risk_type, resolution, data["probability_of_threat"], data["probability_of_detection"], data["probability_of_rejection"],
+        data["path_length"], data["all_threat_index"], [[data["graph"].labels[i] for i in path] for path in paths]
+    ], separators=(",", ":"), sort_keys=True)
+    return content_key(content.encode("utf-8"))
+
+
+def _sweep_size(risk_type, path_length, paths=()):
+    # Number of points the `risk_type` sweep yields
+    if risk_type == "risk_vs_attack":
+        return len(ATTACK_VALUES)
+    if risk_type == "risk_vs_fp_fn":
+        return len(P12_VALUES) * len(P21_VALUES)
+    if risk_type == "risk_vs_length":
+        return LENGTH_STEPS
+    if risk_type == "visualize_node_near_threat":
+        return 2 * max(0, INSERTION_LENGTH - path_length + 1)
+    if risk_type == "risk_per_path":
+        return len(paths)
+    return 0
+
+
+def iter_risk_analysis(data, risk_type, resolution=RESOLUTION, adaptive=False, chunk=None, project=None, error=False):
+    """
+    Run the base risk and the `risk_type` analysis on parsed graph data step by step.
+    Yields ("base", <base payload>, <progress>) first, then ("point", <sweep point>, <progress>)
+    for every point of the sweep as soon as it is solved; sweeps solving batches solve `chunk` points at a time.
+    Analyses of a stored `project` large enough to be worth it are persisted: the base solve as value tables,
+    the sweep as its points, which later analyses load instead of solving again.
+    The grid error of the base risk is only estimated with `error`.
+    """
+    check_analysis_options([risk_type], adaptive)
+
     prob_threat = data["probability_of_threat"]
     prob_detection = data["probability_of_detection"]
     prob_rejection = data["probability_of_rejection"]
     path_length = data["path_length"]
     all_threat_index = data["all_threat_index"]
-    
+    paths = threat_paths(data["graph"], Config.RISK_PATH_COUNT) if risk_type == "risk_per_path" else []
+    total = 1 + _sweep_size(risk_type, path_length, paths)
+    project = persisted_project(project, _analysis_cells(risk_type, path_length, paths, resolution, error))
 
     # 2. Base risk
-    base_result = compute_base_risk(prob_threat, prob_detection, prob_rejection, path_length, all_threat_index)
+    start = time.perf_counter()
+    with stage("base"):
+        base_result = compute_base_risk(prob_threat, prob_detection, prob_rejection, path_length, all_threat_index, resolution, adaptive,
+                                        project, error)
     base_paylod = {
         "risk": base_result["baseRisk"],
+        "riskError": base_result["riskError"],
+        "resolution": resolution,
         "transaction_length": path_length,
         "threat_node": create_human_readable_list(data["threat_node_labels"]),
     }
+    base_time = time.perf_counter() - start
+    yield "base", base_paylod, 1 / total
+
+    # Points of the sweep persisted by an earlier analysis of the project
+    rows = None
+    if project and risk_type in ANALYSIS_TYPES:
+        key = _sweep_key(data, risk_type, paths, resolution)
+        with stage("artifacts"):
+            rows = artifacts.load_rows(project, key)
+
+    if rows is not None:
+        points = rows
 
     # 3. Risk vs. attack probability
-    if risk_type == "risk_vs_attack":
-        risk_attack = compute_risk_vs_attack(prob_detection, prob_rejection, path_length, all_threat_index)
-        base_paylod["riskAttack"] = risk_attack
+    elif risk_type == "risk_vs_attack":
+        points = iter_risk_vs_attack(prob_detection, prob_rejection, path_length, all_threat_index, resolution, chunk)
 
     # 4. Risk vs. false positives/negatives
-    if risk_type == "risk_vs_fp_fn":
-        fn_fp_result = compute_risk_vs_false_neg_pos(prob_threat, path_length, all_threat_index)
-        base_paylod["riskMatrix"] = fn_fp_result["riskMatrix"]
-        base_paylod["p12Values"] = fn_fp_result["p12Values"]
-        base_paylod["p21Values"] = fn_fp_result["p21Values"]
+    elif risk_type == "risk_vs_fp_fn":
+        points = iter_risk_vs_false_neg_pos(prob_threat, path_length, all_threat_index, resolution, chunk)
 
     # 5. Risk vs. length
-    if risk_type == "risk_vs_length":
-        risk_length = compute_risk_vs_length(path_length, prob_threat, prob_detection, prob_rejection, all_threat_index)
-        base_paylod["riskVsLength"] = risk_length
-
+    elif risk_type == "risk_vs_length":
+        points = iter_risk_vs_length(path_length, prob_threat, prob_detection, prob_rejection, all_threat_index, resolution)
 
     # 6. Visualize node near threat
-    if risk_type == "visualize_node_near_threat":
+    elif risk_type == "visualize_node_near_threat":
         p = generate_p(path_length, prob_threat, all_threat_index, perfect_condition=False)
-        lengths_risk = visualize_node_near_threat(p, 12, calculate_cost, value_iteration, calculate_risk, prob_rejection, prob_detection)
-        base_paylod["lengthsInsertBefore"] = lengths_risk["lengths_insert_before"]
-        base_paylod["riskValuesInsertBefore"] = lengths_risk["risk_values_insert_before"]
-        base_paylod["lengthsInsertEnd"] = lengths_risk["lengths_insert_end"]
-        base_paylod["riskValuesInsertEnd"] = lengths_risk["risk_values_insert_end"]
+        points = iter_node_near_threat(p, INSERTION_LENGTH, prob_rejection, prob_detection, resolution)
+
+    # 7. Risk per path
+    elif risk_type == "risk_per_path":
+        points = iter_risk_per_path(data["graph"], paths, prob_threat, prob_detection, prob_rejection, resolution)
+
+    else:
+        points = []
+
+    # Time spent solving the sweep, without the time the consumer of the points takes
+    sweep_time = 0.0
+    solved_points = []
+    solving = time.perf_counter()
+    for solved, point in enumerate(points, start=2):
+        sweep_time += time.perf_counter() - solving
+        solved_points.append(point)
+        yield "point", point, solved / total
+        solving = time.perf_counter()
+
+    if project and rows is None and risk_type in ANALYSIS_TYPES:
+        with stage("artifacts"):
+            artifacts.save_rows(project, key, solved_points)
+
+    if risk_type in ANALYSIS_TYPES:
+        record_stage("sweep", sweep_time)
+    record_analysis(risk_type if risk_type in ANALYSIS_TYPES else "base", base_time + sweep_time)
+
+
+def _empty_sweep(risk_type):
+    # Payload entries of the `risk_type` sweep before any point is solved
+    if risk_type == "risk_vs_attack":
+        return {"riskAttack": []}
+    if risk_type == "risk_vs_fp_fn":
+        return {
+            "riskMatrix": np.zeros((len(P12_VALUES), len(P21_VALUES))).tolist(),
+            "p12Values": P12_VALUES.tolist(),
+            "p21Values": P21_VALUES.tolist()
+        }
+    if risk_type == "risk_vs_length":
+        return {"riskVsLength": []}
+    if risk_type == "visualize_node_near_threat":
+        return {"lengthsInsertBefore": [], "riskValuesInsertBefore": [], "lengthsInsertEnd": [], "riskValuesInsertEnd": []}
+    if risk_type == "risk_per_path":
+        return {"riskPerPath": []}
+    return {}
+
+
+def _add_sweep_point(payload, risk_type, point):
+    # Merge one point of iter_risk_analysis into the response payload
+    if risk_type == "risk_vs_attack":
+        payload["riskAttack"].append(point)
+    elif risk_type == "risk_vs_fp_fn":
+        payload["riskMatrix"][point["row"]][point["column"]] = point["Risk"]
+    elif risk_type == "risk_vs_length":
+        payload["riskVsLength"].append(point)
+    elif risk_type == "risk_per_path":
+        payload["riskPerPath"].append(point)
+    elif point["curve"] == "insert_before":
+        payload["lengthsInsertBefore"].append(point["length"])
+        payload["riskValuesInsertBefore"].append(point["Risk"])
+    else:
+        payload["lengthsInsertEnd"].append(point["length"])
+        payload["riskValuesInsertEnd"].append(point["Risk"])
+
+
+def run_risk_analysis(data, risk_type, resolution=RESOLUTION, adaptive=False, chunk=None, progress=None, project=None,
+                      error=False):
+    """
+    Run the base risk and the `risk_type` analysis on parsed graph data and return the response payload.
+    `progress(fraction, payload)` is called with the partial payload after every solved point.
+    """
+    report = progress or (lambda fraction, payload: None)
+
+    payload = None
+    for event, item, fraction in iter_risk_analysis(data, risk_type, resolution, adaptive, chunk, project, error):
+        if event == "base":
+            payload = item
+            payload.update(_empty_sweep(risk_type))
+        else:
+            _add_sweep_point(payload, risk_type, item)
+        report(fraction, payload)
 
     # Combine and return
-    return jsonify(base_paylod)
\ No newline at end of file
+    return payload
+
+
+def prefetch_base_solves(datasets, resolution=RESOLUTION, error=False):
+    """
+    Solve the base transactions of many parsed graphs together, so their analyses find them in the solve cache.
+    Transactions of the same length are solved in one batch, at the full resolution and with `error` also at the
+    half resolution of the error estimate.
+    """
+    transactions = {}
+    for data in datasets:
+        p11 = data["probability_of_rejection"]
+        p22 = data["probability_of_detection"]
+        p = generate_p(data["path_length"], data["probability_of_threat"], data["all_threat_index"])
+        c = calculate_cost(p)
+        transactions.setdefault(len(p), {})[solve_key(p, c, p11, p22, resolution)] = (p, c, p11, p22, min(0.99, p[0]))
+
+    for batch in transactions.values():
+        p, c, p11, p22, specific_x = (list(column) for column in zip(*batch.values()))
+        for points in (resolution, resolution // 2) if error else (resolution,):
+            map_batch(partial(solve_risk_batch, resolution=points), p, c, p11, p22, specific_x)
+
+
+def run_risk_analysis_batch(items, resolution=RESOLUTION, adaptive=False, error=False):
+    """
+    Run the analyses of many graphs, given as {"nodes": [...], "edges": [...], "types": [...]} items.
+    Identical graphs are parsed once and the base transactions of all graphs are solved together.
+    Returns one {"analyses": {<type>: <payload of runRiskAnalysis>}} or {"error": <message>} per item, in order.
+    """
+    parsed = []
+    for item in items:
+        try:
+            parsed.append(parse_and_initialize({"nodes": item["nodes"], "edges": item["edges"], "type": None})[0])
+        except Exception as e:
+            parsed.append(e)
+
+    if not adaptive:
+        prefetch_base_solves([data for data in parsed if not isinstance(data, Exception)], resolution, error)
+
+    results = []
+    for item, data in zip(items, parsed):
+        try:
+            if isinstance(data, Exception):
+                raise data
+            results.append({"analyses": {
+                risk_type: run_risk_analysis(data, risk_type, resolution, adaptive, error=error)
+                for risk_type in item.get("types", ["base"])
+            }})
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+
+    return results
+
+
+def get_risk_analysis_batch():
+    """
+    Run the analyses of many graphs in one call, posted as {"items": [{"nodes": [...], "edges": [...], "types": [...]}]}.
+    Every item gets the payloads runRiskAnalysis returns for each of its types ("base" by default).
+    """
+    try:
+        resolution, adaptive, error = parse_analysis_options()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    items = (request.get_json(silent=True) or {}).get("items")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Items need to be specified."}), 400
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {Config.BATCH_MAX_ITEMS} items can be analysed in one batch."}), 400
+
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("nodes"), list) or not isinstance(item.get("edges"), list):
+            return jsonify({"error": "Every item needs 'nodes' and 'edges' lists."}), 400
+        types = item.get("types", ["base"])
+        if not isinstance(types, list):
+            return jsonify({"error": "Analysis types need to be a list."}), 400
+        unknown = set(types) - {"base", *ANALYSIS_TYPES}
+        if unknown:
+            return jsonify({"error": f"Unknown analysis type(s): {', '.join(sorted(unknown))}."}), 400
+        try:
+            check_analysis_options(types, adaptive)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    return jsonify({"results": run_risk_analysis_batch(items, resolution, adaptive, error)})
+
+
+def get_risk_analysis():
+    # 1. Parse JSON and set up
+    try:
+        resolution, adaptive, error = parse_analysis_options()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    data, risk_type = parse_and_initialize()
+    try:
+        check_analysis_options([risk_type], adaptive)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(run_risk_analysis(data, risk_type, resolution, adaptive, project=analysis_project(), error=error))
+
+
+def _format_event(event, item, fraction, stream_format):
+    # Serialize one analysis event as an NDJSON line or a Server-Sent Event
+    message = {"event": event, "progress": fraction, "data": item}
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(message)}\n\n"
+    return json.dumps(message) + "\n"
+
+
+def stream_risk_analysis():
+    """
+    Run a risk analysis and stream its base risk and every sweep point as soon as they are solved,
+    as newline-delimited JSON (?format=ndjson, default) or Server-Sent Events (?format=sse).
+    """
+    try:
+        resolution, adaptive, error = parse_analysis_options()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stream_format = request.args.get('format', default="ndjson")
+    if stream_format not in STREAM_FORMATS:
+        return jsonify({"error": f"Unknown stream format '{stream_format}'."}), 400
+
+    chunk = request.args.get('chunk', default=Config.STREAM_CHUNK_SIZE, type=int)
+    if chunk < 1:
+        return jsonify({"error": "Chunk size needs to be at least 1."}), 400
+
+    data, risk_type = parse_and_initialize()
+    try:
+        check_analysis_options([risk_type], adaptive)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    project = analysis_project()
+
+    def generate():
+        try:
+            for event, item, fraction in iter_risk_analysis(data, risk_type, resolution, adaptive, chunk, project, error):
+                yield _format_event(event, item, fraction, stream_format)
+        except Exception as e:
+            yield _format_event("error", {"error": str(e)}, None, stream_format)
+            return
+        yield _format_event("done", None, 1.0, stream_format)
+
+    response = Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[stream_format])
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,117 @@
+# Import necessary modules from standard library
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Import the application configuration
+from config import Config
+
+# Decimals kept when hashing solver inputs, so float noise does not split cache entries
+KEY_DECIMALS = 12
+
+
+def solve_key(p, c, p11, p22, resolution):
+    """Return a canonical hash of the solver inputs (p vector, costs, detection parameters and grid resolution)."""
+    p = np.round(np.asarray(p, dtype=float), KEY_DECIMALS)
+    c = np.round(np.asarray(c, dtype=float), KEY_DECIMALS)
+    detection = np.round(np.array([p11, p22], dtype=float), KEY_DECIMALS)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array([len(p), resolution], dtype=np.int64).tobytes())
+    for array in (p, c, detection):
+        # Normalise -0.0 so it hashes like 0.0
+        digest.update((array + 0.0).tobytes())
+
+    return digest.hexdigest()
+
+
+class SolveCache:
+    """
+    Bounded LRU cache of solver results with an optional time-to-live.
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for `key`, or None when it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """Store `value` under `key`, evicting the least recently used entries beyond the size limit."""
+        if self.maxsize <= 0:
+            return
+
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def discard(self, key):
+        """Drop the entry of `key`, if any."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return the hit/miss counters and the current size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+def freeze(*arrays):
+    """Mark solver outputs read-only before they are shared through a cache."""
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+# Value tables of solved transactions, shared by every request of this process
+solve_cache = SolveCache(Config.SOLVE_CACHE_SIZE, Config.SOLVE_CACHE_TTL)
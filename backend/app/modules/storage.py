@@ -0,0 +1,268 @@
+# Import necessary modules from standard library
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# File locks are only available on POSIX systems, which the preforking production server needs anyway
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Import the application configuration and project index
+from config import Config
+from app.modules.project_index import create_catalog
+
+
+class ProjectStore(ABC):
+    """
+    Storage interface of the project documents.
+    Projects are identified by name (the file name without the .json extension).
+    """
+
+    @abstractmethod
+    def list(self, prefix="", sort="last_saved", descending=True, offset=0, limit=None):
+        """Return the total number of matching projects and the requested page of {name, last_saved}."""
+
+    @abstractmethod
+    def load(self, name):
+        """Return the document of project `name`, or None if it does not exist."""
+
+    @abstractmethod
+    def version(self, name):
+        """Return a token that changes whenever project `name` is saved, or None if it does not exist."""
+
+    @abstractmethod
+    def save(self, name, data):
+        """Atomically create or replace the document of project `name`."""
+
+    @abstractmethod
+    def update(self, name, modify):
+        """
+        Atomically replace the document of project `name` with `modify(existing_document)`.
+        Raises FileNotFoundError if the project does not exist.
+        """
+
+    @abstractmethod
+    def delete(self, name):
+        """Delete project `name`; returns False if it did not exist."""
+
+
+class JsonDirectoryStore(ProjectStore):
+    """
+    One indented JSON file per project in a directory, listed through an in-memory ProjectCatalog.
+    Writes of a project are serialized across threads and, through a lock file per project in `.locks/`,
+    across the worker processes of the production server. Lock files are removed along with their project.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock_path = os.path.join(path, '.locks')
+        self._temp_path = os.path.join(path, '.tmp')
+        os.makedirs(self._lock_path, exist_ok=True)
+        os.makedirs(self._temp_path, exist_ok=True)
+        self._locks = defaultdict(threading.Lock)
+        self.catalog = create_catalog(path)
+
+    def _file_path(self, name):
+        return os.path.join(self.path, f"{name}.json")
+
+    @contextmanager
+    def _locked(self, name):
+        # Hold the lock of project `name` in this process, then the file lock shared with other processes
+        with self._locks[name]:
+            if fcntl is None:
+                yield
+                return
+
+            lock_path = os.path.join(self._lock_path, f"{name}.lock")
+            while True:
+                lock_file = open(lock_path, 'a')
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # The lock file is removed along with its project, so lock it again if that happened while waiting
+                try:
+                    if os.stat(lock_path).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                        break
+                except FileNotFoundError:
+                    pass
+                lock_file.close()
+
+            with lock_file:
+                try:
+                    yield
+                finally:
+                    # Don't keep the lock files of projects that don't exist (anymore), e.g. once deleted
+                    if not os.path.exists(self._file_path(name)):
+                        os.remove(lock_path)
+
+    def _write(self, name, data):
+        # Write to a temporary file first so readers never see a partially written project; it is kept in
+        # a subdirectory, so only the final rename changes the modification time of the projects directory
+        descriptor, temp_path = tempfile.mkstemp(dir=self._temp_path, prefix=f"{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(data, file, indent=2)
+            before = self.catalog.version()
+            os.replace(temp_path, self._file_path(name))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self.catalog.touch(name, before)
+
+    def list(self, prefix="", sort="last_saved", descending=True, offset=0, limit=None):
+        return self.catalog.query(prefix, sort, descending, offset, limit)
+
+    def load(self, name):
+        try:
+            with open(self._file_path(name)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def version(self, name):
+        try:
+            stat = os.stat(self._file_path(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def save(self, name, data):
+        with self._locked(name):
+            self._write(name, data)
+
+    def update(self, name, modify):
+        with self._locked(name):
+            with open(self._file_path(name)) as file:
+                existing_data = json.load(file)
+            self._write(name, modify(existing_data))
+
+    def delete(self, name):
+        # Take the lock of save and update, so a concurrent update can't write the project back
+        with self._locked(name):
+            before = self.catalog.version()
+            try:
+                os.remove(self._file_path(name))
+            except FileNotFoundError:
+                return False
+            self.catalog.remove(name, before)
+        return True
+
+
+class SqliteStore(ProjectStore):
+    """Embedded SQLite database in WAL mode, with one row per project and compact JSON documents."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS projects ("
+                "name TEXT PRIMARY KEY, data TEXT NOT NULL, last_saved REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS projects_last_saved ON projects (last_saved)")
+
+    def _connection(self):
+        # SQLite connections can't be shared between threads, so each thread opens its own
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _serialize(data):
+        return json.dumps(data, separators=(',', ':'))
+
+    def list(self, prefix="", sort="last_saved", descending=True, offset=0, limit=None):
+        # A range on the primary key keeps prefix filtering indexed
+        where = "WHERE name >= ? AND name < ?" if prefix else ""
+        parameters = (prefix, prefix + "\U0010ffff") if prefix else ()
+        order = f"{'last_saved' if sort == 'last_saved' else 'name'} {'DESC' if descending else 'ASC'}"
+
+        connection = self._connection()
+        total = connection.execute(f"SELECT COUNT(*) FROM projects {where}", parameters).fetchone()[0]
+        rows = connection.execute(
+            f"SELECT name, last_saved FROM projects {where} ORDER BY {order} LIMIT ? OFFSET ?",
+            parameters + (-1 if limit is None else limit, offset)
+        ).fetchall()
+
+        return total, [{'name': name, 'last_saved': datetime.fromtimestamp(last_saved).isoformat()} for name, last_saved in rows]
+
+    def load(self, name):
+        row = self._connection().execute("SELECT data FROM projects WHERE name = ?", (name,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def version(self, name):
+        row = self._connection().execute("SELECT last_saved FROM projects WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def save(self, name, data, last_saved=None):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO projects (name, data, last_saved) VALUES (?, ?, ?)",
+            (name, self._serialize(data), last_saved or time.time())
+        )
+
+    def update(self, name, modify):
+        connection = self._connection()
+
+        # Take the write lock before reading, so concurrent saves can't interleave
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT data FROM projects WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                raise FileNotFoundError(f"Project '{name}' does not exist.")
+
+            connection.execute(
+                "UPDATE projects SET data = ?, last_saved = ? WHERE name = ?",
+                (self._serialize(modify(json.loads(row[0]))), time.time(), name)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def delete(self, name):
+        return self._connection().execute("DELETE FROM projects WHERE name = ?", (name,)).rowcount > 0
+
+
+def create_store(projects_path, database_path):
+    """Create the project store selected by Config.PROJECT_STORE ("json" or "sqlite")."""
+    if Config.PROJECT_STORE == "json":
+        return JsonDirectoryStore(projects_path)
+    if Config.PROJECT_STORE == "sqlite":
+        return SqliteStore(database_path)
+    raise ValueError(f"Unknown project store: {Config.PROJECT_STORE}")
+
+
+def migrate_json_projects(projects_path, store, overwrite=False):
+    """Copy every .json project of `projects_path` into `store`, keeping their last saved times; returns the names copied."""
+    migrated = []
+    for file_name in sorted(os.listdir(projects_path)):
+        if not file_name.endswith('.json'):
+            continue
+
+        name = file_name[:-len('.json')]
+        if not overwrite and store.load(name) is not None:
+            continue
+
+        file_path = os.path.join(projects_path, file_name)
+        with open(file_path) as file:
+            data = json.load(file)
+
+        if isinstance(store, SqliteStore):
+            store.save(name, data, last_saved=os.path.getmtime(file_path))
+        else:
+            store.save(name, data)
+        migrated.append(name)
+
+    return migrated
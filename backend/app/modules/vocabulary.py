@@ -1,20 +1,22 @@
 # Import necessary modules from standard library and Flask
 import os
 import json
-from flask import jsonify
 
 # Import necessary paths from app utilities
 from app.utils import data_path
+from app.modules.http_cache import cached_json_response
 
 def get_vocabulary():
     """Retrieve and return vocabulary data from a JSON file as a Flask response."""
     
     # Construct the full path to the vocabulary JSON file
     file_path = os.path.join(data_path, 'vocabulary.json')
+
+    def load_vocabulary():
+        # Open the vocabulary JSON file and load its content
+        with open(file_path) as file:
+            return json.load(file)
     
-    # Open the vocabulary JSON file and load its content
-    with open(file_path) as file:
-        data = json.load(file)
-    
-    # Convert the data to a JSON response using Flask's jsonify function
-    return jsonify(data)
+    # Serve the cached response until the file changes, answering revalidations with 304
+    stat = os.stat(file_path)
+    return cached_json_response('vocabulary', (stat.st_mtime_ns, stat.st_size), load_vocabulary)
@@ -0,0 +1,30 @@
+# Import necessary modules from standard library
+import gc
+import time
+
+# Import the solver
+from app.modules.algorithm import RESOLUTION, belief_grid, calculate_cost, generate_p, value_iteration
+
+# Transaction solved to compile the kernels and fill the cost quantiles
+WARM_UP_LENGTH = 12
+
+
+def warm_up(resolution=RESOLUTION):
+    """
+    Load the solver state every request needs, before a preforking server starts its workers.
+    Returns the time it took in seconds. The workers share the loaded tables copy-on-write; `gc.freeze`
+    keeps the garbage collector from touching (and so copying) the objects created up to this point.
+    """
+    start = time.perf_counter()
+
+    # Belief grid of the default resolution
+    belief_grid(resolution)
+
+    # Solve a representative transaction, which compiles the Numba kernels when they are enabled
+    p = generate_p(WARM_UP_LENGTH, 0.1, {"threat": WARM_UP_LENGTH // 2})
+    c = calculate_cost(p)
+    value_iteration(p, c, 0.9, 0.9, resolution)
+
+    gc.collect()
+    gc.freeze()
+    return time.perf_counter() - start
@@ -2,9 +2,22 @@
 from app import bp
 
 # Import specific functions from different modules in the app package
-from app.modules.projects import get_all_projects, get_project, update_project, delete_project
-from app.modules.risk_analysis import get_risk_analysis
+from app.modules.projects import get_all_projects, get_project, update_project, patch_project, delete_project
+from app.modules.risk_analysis import get_risk_analysis, get_risk_analysis_batch, stream_risk_analysis
+from app.modules.jobs import submit_risk_analysis, get_risk_analysis_job, cancel_risk_analysis_job
+from app.modules.decisions import register_project, unregister_project, get_decision, stream_decisions
 from app.modules.vocabulary import get_vocabulary
+from app.modules.http_cache import compress_response
+from app.modules.metrics import get_metrics, start_request_timer, finish_request_timer
+from config import Config
+
+# Time every request and report its stages in the Server-Timing header
+if Config.METRICS_ENABLED:
+    bp.before_request(start_request_timer)
+    bp.after_request(finish_request_timer)
+
+# Compress large responses for clients that accept it
+bp.after_request(compress_response)
 
 # Link the vocabulary endpoint functions to routes
 bp.add_url_rule('/api/loadVocabulary/', view_func=get_vocabulary, methods=['GET'])
@@ -13,7 +26,24 @@ bp.add_url_rule('/api/loadVocabulary/', view_func=get_vocabulary, methods=['GET'
 bp.add_url_rule('/api/getAllProjects/', view_func=get_all_projects, methods=['GET'])
 bp.add_url_rule('/api/getProject/', view_func=get_project, methods=['GET'])
 bp.add_url_rule('/api/updateProject/', view_func=update_project, methods=['POST'])
+bp.add_url_rule('/api/patchProject/', view_func=patch_project, methods=['PATCH'])
 bp.add_url_rule('/api/deleteProject/', view_func=delete_project, methods=['DELETE'])
 
 # Link the risk analysis endpoint functions to routes
-bp.add_url_rule('/api/runRiskAnalysis/', view_func=get_risk_analysis, methods=['POST'])
\ No newline at end of file
+bp.add_url_rule('/api/runRiskAnalysis/', view_func=get_risk_analysis, methods=['POST'])
+bp.add_url_rule('/api/runRiskAnalysisBatch/', view_func=get_risk_analysis_batch, methods=['POST'])
+bp.add_url_rule('/api/streamRiskAnalysis/', view_func=stream_risk_analysis, methods=['POST'])
+
+# Link the background risk analysis job endpoint functions to routes
+bp.add_url_rule('/api/submitRiskAnalysis/', view_func=submit_risk_analysis, methods=['POST'])
+bp.add_url_rule('/api/getRiskAnalysisJob/', view_func=get_risk_analysis_job, methods=['GET'])
+bp.add_url_rule('/api/cancelRiskAnalysisJob/', view_func=cancel_risk_analysis_job, methods=['DELETE'])
+
+# Link the live decision endpoint functions to routes
+bp.add_url_rule('/api/registerDecisionProject/', view_func=register_project, methods=['POST'])
+bp.add_url_rule('/api/unregisterDecisionProject/', view_func=unregister_project, methods=['DELETE'])
+bp.add_url_rule('/api/getDecision/', view_func=get_decision, methods=['GET'])
+bp.add_url_rule('/api/streamDecisions/', view_func=stream_decisions, methods=['POST'])
+
+# Link the metrics endpoint function to its route
+bp.add_url_rule('/api/metrics', view_func=get_metrics, methods=['GET'])
@@ -5,4 +5,10 @@ base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Construct the path to the directory where JSON data is stored
 data_path = os.path.join(base_path, 'app', 'data')
-projects_path = os.path.join(data_path, 'projects')
\ No newline at end of file
+projects_path = os.path.join(data_path, 'projects')
+
+# Path of the persisted solver artifacts of the projects, outside the watched projects directory
+artifacts_path = os.path.join(data_path, 'artifacts')
+
+# Path of the SQLite database used by the sqlite project store
+database_path = os.path.join(data_path, 'projects.sqlite3')
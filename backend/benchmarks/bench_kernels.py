@@ -0,0 +1,58 @@
+"""
+Microbenchmark of the value iteration kernel backends.
+
+Run from the backend directory:
+    python -m benchmarks.bench_kernels
+"""
+# Import necessary modules from standard library
+import argparse
+import time
+
+import numpy as np
+
+# Import the solver and its kernel backends
+from app.modules import kernels
+from app.modules.algorithm import calculate_cost, value_iteration
+
+
+def time_backend(p, c, p11, p22, backend, repeat):
+    """Return the best wall time in milliseconds of `repeat` solves, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = value_iteration(p, c, p11, p22, backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare value iteration backends across transaction lengths.")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 30, 100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backends = ["numpy"] + (["numba"] if kernels.value_iteration is not None else [])
+    rng = np.random.default_rng(0)
+    p11, p22 = 0.85, 0.9
+
+    # Compile the kernels before timing anything
+    if "numba" in backends:
+        value_iteration([0.95, 0.8], [0.5, 0.5], p11, p22, backend="numba")
+
+    print(f"{'N':>6}" + "".join(f"{backend + ' ms':>14}" for backend in backends) + f"{'speedup':>10}{'identical':>11}")
+    for N in args.lengths:
+        p = np.where(rng.random(N) < 0.1, 0.8, 0.95).tolist()
+        c = calculate_cost(p)
+
+        timings, results = zip(*(time_backend(p, c, p11, p22, backend, args.repeat) for backend in backends))
+        speedup = timings[0] / timings[-1]
+        identical = all(
+            np.array_equal(result, reference)
+            for result, reference in zip(results[-1][:2], results[0][:2])
+        )
+
+        print(f"{N:>6}" + "".join(f"{timing:>14.2f}" for timing in timings) + f"{speedup:>10.1f}{str(identical):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark of the risk pipeline on synthetic graphs: every stage on its own, and every analysis type
+end to end through the Flask test client. Results can be written as JSON and compared against a baseline.
+
+Run from the backend directory:
+    python -m benchmarks.bench_pipeline --output baseline.json
+    python -m benchmarks.bench_pipeline --compare baseline.json
+"""
+# Import necessary modules from standard library
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+from flask import Flask
+
+# Import the application and the stages of the risk pipeline
+from app import bp
+from app.modules import kernels, reachability
+from app.modules.algorithm import calculate_cost, calculate_risk, generate_p, quantile_cache, value_iteration
+from app.modules.graph_model import ROLE_DANGEROUS, ROLE_INITIAL, graph_cache
+from app.modules.risk_analysis import ANALYSIS_TYPES, parse_and_initialize
+from app.modules.solve_cache import solve_cache
+from benchmarks.synthetic import synthetic_graph
+from config import Config
+
+
+def clear_caches():
+    """Drop every cache the pipeline keeps, so each run is measured cold."""
+    graph_cache.clear()
+    solve_cache.clear()
+    quantile_cache.clear()
+
+
+def measure(function, repeat, setup=clear_caches):
+    """Return timings in milliseconds of `repeat` calls of `function`, each after `setup`."""
+    timings = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"best_ms": min(timings), "median_ms": statistics.median(timings), "runs": repeat}
+
+
+def bench_stages(payload, repeat):
+    """Time every stage of a base risk computation on its own."""
+    data, _ = parse_and_initialize(payload)
+    graph = data["graph"]
+    start = graph.nodes_with_role(ROLE_INITIAL)[0]
+    threats = graph.nodes_with_role(ROLE_DANGEROUS)
+
+    p = generate_p(data["path_length"], data["probability_of_threat"], data["all_threat_index"])
+    c = calculate_cost(p)
+    p11, p22 = data["probability_of_rejection"], data["probability_of_detection"]
+    a, b, thresh = value_iteration(p, c, p11, p22)
+
+    return {
+        "stage/parse_and_initialize": measure(lambda: parse_and_initialize(payload), repeat),
+        "stage/path_length": measure(lambda: reachability.path_length(graph, start, threats), repeat),
+        "stage/generate_p": measure(lambda: generate_p(data["path_length"], data["probability_of_threat"], data["all_threat_index"]), repeat),
+        "stage/calculate_cost": measure(lambda: calculate_cost(p), repeat),
+        "stage/value_iteration": measure(lambda: value_iteration(p, c, p11, p22), repeat),
+        "stage/calculate_risk": measure(lambda: calculate_risk(a, p, p11, p22), repeat)
+    }
+
+
+def bench_endpoints(client, payload, repeat):
+    """Time every analysis type through the risk analysis endpoint, with cold and warm caches."""
+    results = {}
+    for analysis in ("base",) + ANALYSIS_TYPES:
+        body = json.dumps(dict(payload, type=analysis))
+
+        def request():
+            response = client.post('/api/runRiskAnalysis/', data=body, content_type='application/json')
+            if response.status_code != 200:
+                raise RuntimeError(f"{analysis} failed with status {response.status_code}")
+
+        results[f"endpoint/{analysis}/cold"] = measure(request, repeat)
+        results[f"endpoint/{analysis}/warm"] = measure(request, repeat, setup=lambda: None)
+    return results
+
+
+def run(args):
+    """Run every benchmark case and return the results document."""
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    client = app.test_client()
+
+    results = {}
+    for situations in args.situations:
+        case = f"situations={situations},depth={args.depth}"
+        payload = synthetic_graph(situations, args.depth, args.threat_density, seed=args.seed)
+        print(f"Benchmarking {case} ...", file=sys.stderr)
+
+        results[case] = bench_stages(payload, args.repeat)
+        if not args.skip_endpoints:
+            results[case].update(bench_endpoints(client, payload, args.repeat))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "solver_backend": kernels.BACKEND,
+            "solver_executor": Config.SOLVER_EXECUTOR,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "options": vars(args)
+        },
+        "results": results
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print the change of every median timing against the baseline; returns the number of regressions."""
+    regressions = 0
+    print(f"{'case':<28}{'benchmark':<40}{'baseline ms':>13}{'current ms':>13}{'change':>9}")
+    for case, benchmarks in current["results"].items():
+        for name, timing in benchmarks.items():
+            reference = baseline["results"].get(case, {}).get(name)
+            if reference is None:
+                print(f"{case:<28}{name:<40}{'-':>13}{timing['median_ms']:>13.2f}{'new':>9}")
+                continue
+
+            ratio = timing["median_ms"] / max(reference["median_ms"], 1e-9)
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  slower"
+                regressions += 1
+            elif ratio < 1 / (1 + threshold):
+                flag = "  faster"
+            print(f"{case:<28}{name:<40}{reference['median_ms']:>13.2f}{timing['median_ms']:>13.2f}{ratio:>8.2f}x{flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the risk pipeline on synthetic graphs.")
+    parser.add_argument("--situations", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--depth", type=int, default=12, help="Layers of situations, i.e. the transaction length")
+    parser.add_argument("--threat-density", type=float, default=0.1, help="Share of dangerous situations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-endpoints", action="store_true", help="Only time the individual stages")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Compare the results against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change reported as slower or faster")
+    args = parser.parse_args()
+
+    current = run(args)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(current, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(current, baseline, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    if not args.output:
+        json.dump(current, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Synthetic project graphs in the shape the frontend posts to the risk analysis endpoints.
+"""
+# Import necessary modules from standard library
+import random
+
+
+def _node(node_type, node_id, label, sub_type):
+    return {
+        "id": f"{node_type}_{node_id}",
+        "label": label,
+        "type": node_type,
+        "data": {
+            "id": node_id,
+            "label": label,
+            "nodeType": sub_type,
+            "simulated": False,
+            "displayWarning": False,
+            "hasThreat": False,
+            "hasDetection": False
+        },
+        "position": {"x": 0, "y": 0}
+    }
+
+
+def _edge(source, target, edge_type, probability=None, secondary_probability=None):
+    return {
+        "id": f"{source}:{target}:{edge_type}",
+        "source": source,
+        "target": target,
+        "type": edge_type,
+        "data": {
+            "sourceNodeId": source,
+            "targetNodeId": target,
+            "edgeType": edge_type,
+            "probability": probability,
+            "secondaryProbability": secondary_probability
+        }
+    }
+
+
+def synthetic_graph(situations=100, depth=10, threat_density=0.1, detections=None, branching=2, seed=0, analysis="base"):
+    """
+    Return a {"nodes", "edges", "type"} payload with `situations` situations in `depth` layers.
+    Every situation has `branching` transitions from the previous layer, a `threat_density` share of them
+    is dangerous with a threat event, and `detections` detection events (one per layer by default) are attached at random.
+    """
+    rnd = random.Random(seed)
+    depth = max(1, min(depth, situations))
+    nodes = []
+    edges = []
+
+    # Situations in layers, the first one being the initial situation
+    layers = [[0]] + [[] for _ in range(depth - 1)]
+    for i in range(1, situations):
+        layers[1 + (i - 1) % (depth - 1) if depth > 1 else 0].append(i)
+
+    dangerous = set(rnd.sample(range(1, situations), max(1, round(threat_density * (situations - 1))))) if situations > 1 else {0}
+    for layer in layers:
+        for i in layer:
+            sub_type = "initial" if i == 0 else ("dangerous" if i in dangerous else "safe")
+            nodes.append(_node("situation", i, f"Situation {i}", sub_type))
+
+    # Transitions from the previous layer (and occasionally back to it)
+    for previous, layer in zip(layers, layers[1:]):
+        for i in layer:
+            for source in {rnd.choice(previous) for _ in range(branching)}:
+                edge_type = "crash" if source in dangerous else "action"
+                edges.append(_edge(f"situation_{source}", f"situation_{i}", edge_type, round(rnd.uniform(0.5, 1.0), 2)))
+            if rnd.random() < 0.05:
+                edges.append(_edge(f"situation_{i}", f"situation_{rnd.choice(previous)}", "action", round(rnd.uniform(0.5, 1.0), 2)))
+
+    # Threat events of the dangerous situations and detection events
+    event = 0
+    for i in sorted(dangerous):
+        nodes.append(_node("event", event, f"Threat {event}", "threat"))
+        edges.append(_edge(f"situation_{i}", f"event_{event}", "appearance", round(rnd.uniform(0.05, 0.3), 2)))
+        event += 1
+
+    for _ in range(depth if detections is None else detections):
+        nodes.append(_node("event", event, f"Detection {event}", "detection"))
+        edges.append(_edge(
+            f"situation_{rnd.randrange(situations)}", f"event_{event}", "observation",
+            round(rnd.uniform(0.8, 0.99), 2), round(rnd.uniform(0.8, 0.99), 2)
+        ))
+        event += 1
+
+    return {"nodes": nodes, "edges": edges, "type": analysis}
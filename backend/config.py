@@ -1,10 +1,113 @@
+import os
+
+
 class Config:
     # Allowed origins for CORS
-    ORIGINS = ["http://localhost:5173"]
+    ORIGINS = os.environ.get("CYDRA_ORIGINS", "http://localhost:5173").split(",")
     
-    # Port number where the Flask app will run
-    PORT = 8080
+    # Host and port number where the Flask app will run
+    HOST = os.environ.get("CYDRA_HOST", "127.0.0.1")
+    PORT = int(os.environ.get("CYDRA_PORT", 8080))
     
-    # Enable or disable debug mode (set to True for development, False for production)
-    DEBUG = True
-    
\ No newline at end of file
+    # Enable or disable debug mode (on for the development server of app.py, off for the production entry points)
+    DEBUG = os.environ.get("CYDRA_DEBUG", "true").lower() in ("1", "true")
+
+    # Worker processes of the production server (defaults to one per core)
+    SERVER_WORKERS = int(os.environ.get("CYDRA_WORKERS", os.cpu_count() or 1))
+
+    # Threads per worker process of the production server
+    SERVER_THREADS = int(os.environ.get("CYDRA_THREADS", 4))
+
+    # Seconds a request may take before the production server restarts its worker
+    SERVER_TIMEOUT = int(os.environ.get("CYDRA_TIMEOUT", 120))
+
+    # Requests after which a worker of the production server is replaced (0 never replaces it)
+    SERVER_MAX_REQUESTS = int(os.environ.get("CYDRA_MAX_REQUESTS", 5000))
+
+    # Load the solver tables and compile the kernels before the production server forks its workers
+    WARM_UP = os.environ.get("CYDRA_WARM_UP", "true").lower() in ("1", "true")
+
+    # Executor used for independent solves of the risk sweeps ("serial", "thread" or "process")
+    SOLVER_EXECUTOR = "serial"
+
+    # Number of worker threads/processes of the solver executor (None uses every available core)
+    SOLVER_WORKERS = None
+
+    # Maximum number of solved transactions kept in memory (0 disables the solve cache)
+    SOLVE_CACHE_SIZE = 256
+
+    # Seconds a solved transaction stays in the solve cache (None keeps entries until evicted)
+    SOLVE_CACHE_TTL = 3600
+
+    # Largest belief grid resolution a request may ask for; value tables grow linearly with it
+    MAX_RESOLUTION = 10000
+
+    # Kernel backend of value iteration ("auto" uses Numba when it is installed, "numpy" never does)
+    SOLVER_BACKEND = "auto"
+
+    # Maximum number of parsed project graphs kept, so repeated analyses of a graph skip parsing
+    GRAPH_CACHE_SIZE = 64
+
+    # Collect request/stage timings, Server-Timing headers and the /api/metrics counters
+    METRICS_ENABLED = True
+
+    # Directory the worker processes of the production server publish their metrics to, so /api/metrics
+    # reports the sum over all of them (a new temporary directory by default)
+    METRICS_DIR = os.environ.get("CYDRA_METRICS_DIR")
+
+    # Seconds between two metrics snapshots written by a worker process of the production server
+    METRICS_PUBLISH_INTERVAL = 1.0
+
+    # Log the stage timings of every request as one JSON line to the "cydra.timing" logger
+    TIMING_LOG = False
+
+    # Number of shortest paths from the initial situation to a dangerous one scored by the risk_per_path analysis
+    RISK_PATH_COUNT = 10
+
+    # Maximum number of graphs analysed by one batch risk analysis request
+    BATCH_MAX_ITEMS = 200
+
+    # Seconds between checks of the projects directory for changes made by other processes
+    PROJECT_INDEX_CHECK_INTERVAL = 2.0
+
+    # Seconds after which the project index is fully re-scanned, to catch files edited in place
+    PROJECT_INDEX_RESCAN_INTERVAL = 300.0
+
+    # Backend storing the projects ("json" for one file per project, "sqlite" for an embedded database)
+    PROJECT_STORE = "json"
+
+    # Maximum number of serialized read responses (vocabulary, projects) kept for ETag revalidation
+    RESPONSE_CACHE_SIZE = 128
+
+    # Responses larger than this many bytes are compressed for clients accepting gzip or brotli
+    COMPRESSION_MIN_SIZE = 1024
+
+    # Number of worker threads running background risk analysis jobs
+    JOB_WORKERS = 2
+
+    # Maximum number of queued or running risk analysis jobs per user
+    JOB_LIMIT_PER_USER = 2
+
+    # Seconds the results of finished risk analysis jobs are kept
+    JOB_RETENTION = 600
+
+    # Number of sweep points solved per batch when streaming or running analyses in the background
+    STREAM_CHUNK_SIZE = 6
+
+    # Maximum number of projects registered for live decisions kept solved in memory; the least recently used
+    # ones are dropped (and solved again on their next request, when registrations are shared)
+    DECISION_MAX_PROJECTS = 32
+
+    # Directory the worker processes of the production server share background jobs and projects registered
+    # for live decisions through, so any worker can answer their requests (a new temporary directory by default)
+    STATE_DIR = os.environ.get("CYDRA_STATE_DIR")
+
+    # Persist the solves and analysis sweeps of stored projects, to be loaded instead of solved again
+    SOLVER_ARTIFACTS = True
+
+    # Maximum number of persisted solves and analysis sweeps kept per project
+    SOLVER_ARTIFACTS_PER_PROJECT = 16
+
+    # Smallest analysis (stages x belief grid points, summed over all of its transactions) that is persisted;
+    # loading smaller ones is slower than solving them
+    SOLVER_ARTIFACTS_MIN_CELLS = 100000
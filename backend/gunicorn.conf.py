@@ -0,0 +1,92 @@
+# Gunicorn settings of the production server, taken from config.py and its environment variables
+import os
+import shutil
+import tempfile
+
+# Debug mode is meant for the development server of app.py, so it is off here unless set explicitly
+# (before config.py reads the environment)
+os.environ.setdefault("CYDRA_DEBUG", "false")
+
+from config import Config
+
+bind = f"{Config.HOST}:{Config.PORT}"
+
+# Preforked worker processes, each serving requests on a pool of threads
+workers = Config.SERVER_WORKERS
+threads = Config.SERVER_THREADS
+worker_class = "gthread"
+
+# Import the application (and warm the solver) once in the master, then fork the workers,
+# so they share the loaded modules and tables instead of each building their own
+preload_app = True
+
+# Seconds a worker may take for a request before it is restarted
+timeout = Config.SERVER_TIMEOUT
+graceful_timeout = Config.SERVER_TIMEOUT
+
+# Restart workers after a number of requests to bound memory growth of the caches
+max_requests = Config.SERVER_MAX_REQUESTS
+max_requests_jitter = Config.SERVER_MAX_REQUESTS // 10
+
+accesslog = "-"
+
+
+# Every worker publishes its metrics to a directory shared by all of them, so /api/metrics
+# reports the whole server instead of the one worker that answered
+metrics_dir = None
+
+# Background jobs and projects registered for live decisions are shared through a directory as well,
+# so requests following up on them can reach any worker
+state_dir = None
+
+
+def on_starting(server):
+    global metrics_dir, state_dir
+    if Config.METRICS_DIR:
+        metrics_dir = Config.METRICS_DIR
+        os.makedirs(metrics_dir, exist_ok=True)
+        # Drop the snapshots of a previous run
+        for name in os.listdir(metrics_dir):
+            if name.endswith(".json"):
+                os.remove(os.path.join(metrics_dir, name))
+    else:
+        metrics_dir = tempfile.mkdtemp(prefix="cydra-metrics-")
+
+    state_dir = Config.STATE_DIR or tempfile.mkdtemp(prefix="cydra-state-")
+    # Drop the jobs and registrations of a previous run, whose workers are gone
+    for name in ("jobs", "decisions"):
+        shutil.rmtree(os.path.join(state_dir, name), ignore_errors=True)
+        os.makedirs(os.path.join(state_dir, name))
+
+
+def post_fork(server, worker):
+    from app.modules.decisions import share_decisions
+    from app.modules.jobs import share_jobs
+    from app.modules.metrics import share_metrics
+    if Config.METRICS_ENABLED:
+        share_metrics(metrics_dir, Config.METRICS_PUBLISH_INTERVAL)
+    share_jobs(os.path.join(state_dir, "jobs"))
+    share_decisions(os.path.join(state_dir, "decisions"))
+
+
+def worker_exit(server, worker):
+    from app.modules.metrics import publish_metrics
+    publish_metrics()
+
+
+def child_exit(server, worker):
+    # Fold the counters of the exited worker into those of the retired workers and drop its gauges
+    from app.modules.metrics import SharedMetrics
+    if Config.METRICS_ENABLED:
+        SharedMetrics(metrics_dir).retire(worker.pid)
+
+    # Its unfinished jobs can no longer complete
+    from app.modules.jobs import retire_jobs
+    retire_jobs(os.path.join(state_dir, "jobs"), worker.pid)
+
+
+def on_exit(server):
+    if not Config.METRICS_DIR:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+    if not Config.STATE_DIR:
+        shutil.rmtree(state_dir, ignore_errors=True)
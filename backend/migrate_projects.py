@@ -0,0 +1,17 @@
+# Import necessary modules from standard library
+import argparse
+
+# Import the project stores and default paths
+from app.utils import projects_path, database_path
+from app.modules.storage import SqliteStore, migrate_json_projects
+
+# Copy the .json projects of a directory into the SQLite project store
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Migrate .json project files into the SQLite project store.")
+    parser.add_argument("--source", default=projects_path, help="directory holding the .json project files")
+    parser.add_argument("--database", default=database_path, help="SQLite database to migrate the projects into")
+    parser.add_argument("--overwrite", action="store_true", help="replace projects already in the database")
+    args = parser.parse_args()
+
+    migrated = migrate_json_projects(args.source, SqliteStore(args.database), args.overwrite)
+    print(f"Migrated {len(migrated)} project(s) into {args.database}")
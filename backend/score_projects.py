@@ -0,0 +1,47 @@
+# Import necessary modules from standard library
+import argparse
+import json
+import os
+import sys
+import time
+
+# Import the default projects path and the batch risk analysis
+from app.utils import projects_path
+from app.modules.graph_model import graph_from_project
+from app.modules.risk_analysis import ANALYSIS_TYPES, run_risk_analysis_batch
+from app.modules.algorithm import RESOLUTION
+
+# Score every .json project of a directory offline, without running the server
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run risk analyses on every .json project file of a directory.")
+    parser.add_argument("--source", default=projects_path, help="directory holding the .json project files")
+    parser.add_argument("--types", nargs="+", default=["base"], choices=("base",) + ANALYSIS_TYPES,
+                        help="analysis types to run on every project")
+    parser.add_argument("--resolution", type=int, default=RESOLUTION, help="belief grid resolution of the solver")
+    parser.add_argument("--output", help="file to write the results to as JSON (printed when omitted)")
+    args = parser.parse_args()
+
+    names = sorted(entry.name[:-len('.json')] for entry in os.scandir(args.source) if entry.name.endswith('.json'))
+    items = []
+    for name in names:
+        with open(os.path.join(args.source, f"{name}.json")) as file:
+            nodes, edges = graph_from_project(json.load(file))
+        items.append({"nodes": nodes, "edges": edges, "types": args.types})
+
+    start = time.perf_counter()
+    results = run_risk_analysis_batch(items, args.resolution)
+    elapsed = time.perf_counter() - start
+
+    scores = dict(zip(names, results))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(scores, file, indent=2)
+    else:
+        json.dump(scores, sys.stdout, indent=2)
+        print()
+
+    failed = sum("error" in result for result in results)
+    print(f"Scored {len(names) - failed} of {len(names)} project(s) in {elapsed:.2f}s", file=sys.stderr)
+    for name, result in scores.items():
+        if "error" in result:
+            print(f"  {name}: {result['error']}", file=sys.stderr)
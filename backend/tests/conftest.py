@@ -0,0 +1,6 @@
+# Import necessary modules from standard library
+import os
+import sys
+
+# Run the tests against the backend package, from any working directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
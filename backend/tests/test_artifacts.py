@@ -0,0 +1,59 @@
+"""Analyses of stored projects persist their solves and sweeps, which later analyses load instead of solving."""
+# Import necessary modules
+import os
+
+import pytest
+
+from config import Config
+from app.modules import risk_analysis
+from app.modules.artifacts import SolverArtifacts
+from app.modules.solve_cache import solve_cache
+from benchmarks.synthetic import synthetic_graph
+
+
+@pytest.fixture
+def artifacts(tmp_path, monkeypatch):
+    artifacts = SolverArtifacts(str(tmp_path))
+    monkeypatch.setattr(risk_analysis, "artifacts", artifacts)
+    return artifacts
+
+
+@pytest.fixture
+def data():
+    payload = synthetic_graph(60, 30, 0.2, seed=3)
+    return risk_analysis.initialize_graph(payload["nodes"], payload["edges"])
+
+
+def analyse(data, risk_type, project):
+    solve_cache.clear()
+    return risk_analysis.run_risk_analysis(data, risk_type, resolution=200, project=project)
+
+
+@pytest.mark.parametrize("risk_type", risk_analysis.ANALYSIS_TYPES)
+def test_sweeps_are_loaded_instead_of_solved(artifacts, data, risk_type, monkeypatch):
+    monkeypatch.setattr(Config, "SOLVER_ARTIFACTS_MIN_CELLS", 0)
+    expected = analyse(data, risk_type, None)
+    assert analyse(data, risk_type, "project") == expected
+
+    # Every solve of the analysis is persisted, so nothing is solved again
+    def solve(*args, **kwargs):
+        raise AssertionError("solved again")
+
+    monkeypatch.setattr(risk_analysis, "value_iteration", solve)
+    monkeypatch.setattr(risk_analysis, "value_iteration_batch", solve)
+    monkeypatch.setattr(risk_analysis, "IncrementalSolver", solve)
+    assert analyse(data, risk_type, "project") == expected
+
+    artifacts.invalidate("project")
+    assert not os.path.exists(os.path.join(artifacts.path, "project"))
+
+
+def test_small_analyses_are_not_persisted(artifacts, data, monkeypatch):
+    cells = data["path_length"] * 200
+    monkeypatch.setattr(Config, "SOLVER_ARTIFACTS_MIN_CELLS", cells + 1)
+    analyse(data, "base", "project")
+    assert not os.path.exists(os.path.join(artifacts.path, "project"))
+
+    # The threshold applies to the whole analysis, not to its largest table
+    analyse(data, "risk_vs_attack", "project")
+    assert len(os.listdir(os.path.join(artifacts.path, "project"))) == 2
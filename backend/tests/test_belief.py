@@ -0,0 +1,76 @@
+"""Batched belief updates of the compiled BeliefModel against the dict-based update_belief, dense and sparse."""
+# Import necessary modules
+import random
+
+import numpy as np
+import pytest
+from scipy import sparse as sp
+
+from app.modules import belief as belief_module
+from app.modules.algorithm import update_belief
+from app.modules.belief import BeliefModel
+
+
+def random_model(seed, states=12, actions=3, observations=3, density=0.4):
+    # Random dict models with missing entries, zero probabilities and an observation no state can emit
+    rng = random.Random(seed)
+    states = [f"s{i}" for i in range(states)]
+    actions = [f"a{i}" for i in range(actions)]
+    observations = [f"o{i}" for i in range(observations)]
+    transition_model = {
+        (s, action): {s_prime: rng.choice((0.0, rng.random())) for s_prime in states if rng.random() < density}
+        for s in states for action in actions if rng.random() < 0.9
+    }
+    observation_model = {
+        (action, s_prime): dict({o: rng.random() for o in observations if rng.random() < 0.6}, never=0.0)
+        for action in actions for s_prime in states if rng.random() < 0.9
+    }
+    return states, actions, observations, transition_model, observation_model
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_batched_updates_match_update_belief(seed, sparse):
+    states, actions, observations, transition_model, observation_model = random_model(seed)
+    model = BeliefModel(states, transition_model, observation_model, sparse=sparse)
+    assert model.sparse == sparse
+
+    rng = random.Random(seed)
+    count = 50
+    beliefs = np.random.default_rng(seed).random((count, len(states)))
+    # Unknown actions and observations, and one that has probability 0 everywhere, give zero evidence
+    transaction_actions = [rng.choice(actions + ["unknown"]) for _ in range(count)]
+    transaction_observations = [rng.choice(observations + ["unknown", "never"]) for _ in range(count)]
+
+    updated = model.update(beliefs, transaction_actions, transaction_observations)
+    for row, action, observation, result in zip(beliefs, transaction_actions, transaction_observations, updated):
+        expected = update_belief(states, model.as_dict(row), action, observation, transition_model, observation_model)
+        assert np.allclose(result, model.vector(expected), rtol=1e-12, atol=0)
+
+    assert any(not result.any() for result in updated)
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_single_update_with_one_label_for_every_transaction(sparse):
+    states, actions, observations, transition_model, observation_model = random_model(1)
+    model = BeliefModel(states, transition_model, observation_model, sparse=sparse)
+    belief = {s: 1 / len(states) for s in states}
+
+    for action in actions + ["unknown"]:
+        for observation in observations + ["never"]:
+            expected = update_belief(states, belief, action, observation, transition_model, observation_model)
+            updated = model.update([model.vector(belief)] * 2, action, observation)
+            assert np.allclose(updated, model.vector(expected), rtol=1e-12, atol=0)
+
+
+def test_large_sparse_models_are_built_sparse():
+    states, actions, observations, transition_model, observation_model = random_model(
+        2, states=belief_module.SPARSE_MIN_STATES, density=0.02)
+    model = BeliefModel(states, transition_model, observation_model)
+
+    assert model.sparse
+    assert all(sp.issparse(matrix) and matrix.shape == (len(states), len(states)) for matrix in model.transition)
+    # Only the non-zero probabilities are stored, and the extra action for unknown ones is empty
+    assert sum(matrix.nnz for matrix in model.transition) == sum(
+        1 for probabilities in transition_model.values() for probability in probabilities.values() if probability)
+    assert model.transition[-1].nnz == 0
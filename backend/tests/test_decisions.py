@@ -0,0 +1,57 @@
+"""Projects registered for live decisions in one worker process can be answered by every other worker sharing their directory."""
+# Import necessary modules
+import json
+
+import pytest
+from flask import Flask
+
+from app import bp
+from app.modules import decisions
+from app.modules.solve_cache import SolveCache
+from benchmarks.synthetic import synthetic_graph
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(decisions, "policies", SolveCache(4))
+    monkeypatch.setattr(decisions, "registrations", None)
+    decisions.share_decisions(str(tmp_path))
+
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    return app.test_client()
+
+
+def register(client, seed, resolution=50):
+    payload = synthetic_graph(30, 6, 0.2, seed=seed)
+    return client.post(f'/api/registerDecisionProject/?name=demo&resolution={resolution}',
+                       data=json.dumps({"nodes": payload["nodes"], "edges": payload["edges"]}), content_type='application/json')
+
+
+def test_other_workers_solve_shared_registrations(client):
+    registered = register(client, seed=1).get_json()
+    decision = client.get('/api/getDecision/?name=demo&stage=1&belief=0.7').get_json()
+
+    # Another worker has not solved the project yet
+    decisions.policies.clear()
+    assert client.get('/api/getDecision/?name=demo&stage=1&belief=0.7').get_json() == decision
+    assert decisions.policies.get("demo").to_dict() == {key: value for key, value in registered.items() if key != "name"}
+
+
+def test_replaced_and_dropped_registrations_are_seen_by_other_workers(client):
+    register(client, seed=1)
+    policy = decisions.policies.get("demo")
+
+    # Another worker registers a different graph under the same name
+    registered = register(client, seed=2, resolution=40).get_json()
+    decisions.policies.put("demo", policy)
+    assert client.get('/api/getDecision/?name=demo').get_json() == registered["initial"]
+    assert decisions.policies.get("demo") is not policy
+
+    # Another worker drops the registration
+    policy = decisions.policies.get("demo")
+    assert client.delete('/api/unregisterDecisionProject/?name=demo').status_code == 200
+    decisions.policies.put("demo", policy)
+    assert client.get('/api/getDecision/?name=demo').status_code == 404
+    assert client.post('/api/streamDecisions/?name=demo', data="{}\n").status_code == 404
+    assert decisions.policies.get("demo") is None
@@ -0,0 +1,105 @@
+"""
+Background risk analysis jobs always end in a final state, so they stop counting against their owner,
+and can be followed from every worker process sharing their directory.
+"""
+# Import necessary modules
+import os
+import threading
+
+import pytest
+
+from app.modules.jobs import JobLimitError, JobQueue, retire_jobs
+
+
+def test_cancel_while_starting_finishes_the_job():
+    queue = JobQueue(max_workers=1, per_owner_limit=1)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    # A worker thread picks the job up, but it is cancelled before it starts running
+    run = queue._run
+
+    def run_after_cancel(job, function, args):
+        started.set()
+        release.wait(5)
+        run(job, function, args)
+
+    queue._run = run_after_cancel
+    job = queue.submit("user", lambda progress: calls.append("ran"))
+    assert started.wait(5)
+
+    assert queue.cancel(job.id) is job
+    assert not job.future.cancel()
+    release.set()
+    job.future.result(5)
+
+    assert job.status == "cancelled"
+    assert job.finished is not None
+    assert calls == []
+
+    # The cancelled job no longer counts against the owner's limit
+    queue._run = run
+    assert queue.submit("user", lambda progress: None).future.result(5) is None
+
+
+def test_active_jobs_count_against_the_owner_limit():
+    queue = JobQueue(max_workers=1, per_owner_limit=1)
+    release = threading.Event()
+
+    job = queue.submit("user", lambda progress: release.wait(5))
+    with pytest.raises(JobLimitError):
+        queue.submit("user", lambda progress: None)
+    queue.submit("other", lambda progress: None)
+
+    release.set()
+    job.future.result(5)
+    assert job.status == "done"
+    queue.submit("user", lambda progress: None)
+
+
+def test_shared_jobs_are_reported_and_cancelled_by_other_workers(tmp_path):
+    # Two queues sharing a directory stand in for two worker processes
+    worker, other = JobQueue(max_workers=1, per_owner_limit=1, path=str(tmp_path)), JobQueue(per_owner_limit=1, path=str(tmp_path))
+    reported = threading.Event()
+    release = threading.Event()
+
+    def analysis(progress):
+        progress(0.5, {"risk": [1]})
+        reported.set()
+        release.wait(5)
+        progress(1.0, {"risk": [1, 2]})
+
+    job = worker.submit("user", analysis)
+    assert reported.wait(5)
+
+    shared = other.get(job.id)
+    assert shared is not job
+    assert shared.to_dict() == {"jobId": job.id, "status": "running", "progress": 0.5, "result": {"risk": [1]}, "error": None}
+    # The owner limit counts the jobs of every worker
+    with pytest.raises(JobLimitError):
+        other.submit("user", lambda progress: None)
+
+    assert other.cancel(job.id).status == "running"
+    release.set()
+    job.future.result(5)
+    assert other.get(job.id).status == "cancelled"
+    assert other.get("../" + job.id) is None
+
+
+def test_jobs_of_exited_workers_fail(tmp_path):
+    worker, other = JobQueue(max_workers=1, path=str(tmp_path)), JobQueue(path=str(tmp_path))
+    started = threading.Event()
+    release = threading.Event()
+
+    def analysis(progress):
+        started.set()
+        release.wait(5)
+
+    job = worker.submit("user", analysis)
+    assert started.wait(5)
+
+    retire_jobs(str(tmp_path), os.getpid())
+    assert other.get(job.id).status == "failed"
+    assert other.get(job.id).finished is not None
+    release.set()
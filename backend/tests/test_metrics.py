@@ -0,0 +1,90 @@
+"""The metrics of the worker processes of a preforking server are reported as their sum."""
+# Import necessary modules
+import json
+import multiprocessing
+import os
+
+from flask import Flask
+
+from app import bp
+from app.modules import metrics
+from benchmarks.synthetic import synthetic_graph
+
+REQUESTS = 5
+
+
+def handle_requests_in_worker(path, status):
+    # A forked worker counting its own requests and publishing them to the shared directory
+    metrics.registry = metrics.MetricsRegistry()
+    metrics.share_metrics(path, interval=60)
+    for _ in range(REQUESTS):
+        metrics.registry.inc("cydra_requests_total", (("endpoint", "main.get_metrics"), ("status", status)))
+        metrics.registry.observe("cydra_request_duration_seconds", 0.02, (("endpoint", "main.get_metrics"),))
+    metrics.publish_metrics()
+
+
+def test_metrics_are_summed_over_workers(tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=handle_requests_in_worker, args=(str(tmp_path), status))
+        for status in ("200", "200", "404")
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    text = metrics.render_snapshots(metrics.SharedMetrics(str(tmp_path)).read())
+    assert f'cydra_requests_total{{endpoint="main.get_metrics",status="200"}} {2 * REQUESTS}' in text
+    assert f'cydra_requests_total{{endpoint="main.get_metrics",status="404"}} {REQUESTS}' in text
+    assert f'cydra_request_duration_seconds_bucket{{endpoint="main.get_metrics",le="0.025"}} {3 * REQUESTS}' in text
+    assert f'cydra_request_duration_seconds_count{{endpoint="main.get_metrics"}} {3 * REQUESTS}' in text
+
+
+def test_single_process_renders_its_own_metrics():
+    registry = metrics.MetricsRegistry()
+    registry.inc("cydra_solves_total", amount=3)
+    registry.observe("cydra_solve_grid_size", 1000, buckets=metrics.GRID_BUCKETS, count=3)
+
+    text = registry.render()
+    assert "cydra_solves_total 3" in text
+    assert 'cydra_solve_grid_size_bucket{le="1000"} 3' in text
+    assert 'cydra_cache_hit_ratio{cache="solve"}' in text
+
+
+def test_exited_workers_are_folded_into_the_retired_snapshot(tmp_path):
+    shared = metrics.SharedMetrics(str(tmp_path))
+    registry = metrics.MetricsRegistry()
+    registry.inc("cydra_solves_total", amount=4)
+    snapshot = registry.snapshot()
+    snapshot["caches"]["solve"]["size"] = 7
+
+    # Two workers exit, the second with the process id of the first
+    for _ in range(2):
+        with open(tmp_path / "1234.json", "w") as file:
+            json.dump(snapshot, file)
+        shared.retire(1234)
+        assert not (tmp_path / "1234.json").exists()
+
+    with open(tmp_path / "5678.json", "w") as file:
+        json.dump(snapshot, file)
+
+    text = metrics.render_snapshots(shared.read())
+    assert "cydra_solves_total 12" in text
+    assert 'cydra_cache_entries{cache="solve"} 7' in text
+    assert sorted(os.listdir(tmp_path)) == [".lock", "5678.json", metrics.RETIRED_FILE]
+
+
+def test_streamed_responses_have_no_server_timing():
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    payload = synthetic_graph(20, 10, 0.2, seed=1)
+
+    response = app.test_client().post('/api/streamRiskAnalysis/', data=json.dumps(dict(payload, type="base")),
+                                      content_type='application/json')
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+
+    response = app.test_client().get('/api/metrics')
+    assert "Server-Timing" in response.headers
@@ -0,0 +1,71 @@
+"""Node/edge patches of projects through the patchProject endpoint."""
+# Import necessary modules
+import pytest
+from flask import Flask
+
+from app import bp
+from app.modules import projects
+from app.modules.storage import JsonDirectoryStore
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = JsonDirectoryStore(str(tmp_path))
+    store.save("project", {
+        "situations": [{"id": "1", "label": "Start"}, {"id": "2", "label": "Crash"}],
+        "events": [],
+        "relationships": [{"id": "r1", "source": "1", "target": "2"}],
+        "simulated_path": [],
+        "version": 3
+    })
+    monkeypatch.setattr(projects, "store", store)
+
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    client = app.test_client()
+    client.store = store
+    return client
+
+
+def patch(client, operations, base_version=3):
+    return client.patch('/api/patchProject/?filename=project.json', json={"baseVersion": base_version, "operations": operations})
+
+
+def test_add_replace_and_remove(client):
+    response = patch(client, [
+        {"op": "add", "path": "/situations/3", "value": {"id": "3", "label": "Stop"}},
+        {"op": "replace", "path": "/situations/1", "value": {"id": "1", "label": "Begin"}},
+        {"op": "remove", "path": "/relationships/r1"}
+    ])
+    assert response.status_code == 200
+    assert response.get_json()["version"] == 4
+
+    document = client.store.load("project")
+    assert document["situations"] == [{"id": "1", "label": "Begin"}, {"id": "2", "label": "Crash"}, {"id": "3", "label": "Stop"}]
+    assert document["relationships"] == []
+    assert document["version"] == 4
+
+
+def test_stale_base_version_conflicts(client):
+    response = patch(client, [{"op": "remove", "path": "/situations/2"}], base_version=2)
+    assert response.status_code == 409
+    assert response.get_json()["version"] == 3
+    assert len(client.store.load("project")["situations"]) == 2
+
+
+@pytest.mark.parametrize("operation", [
+    {"op": "replace", "path": "/situations/1", "value": {"id": "2", "label": "Begin"}},
+    {"op": "replace", "path": "/situations/1", "value": {"label": "Begin"}},
+    {"op": "add", "path": "/situations/3", "value": {"id": "1", "label": "Stop"}},
+    {"op": "add", "path": "/situations/2", "value": {"id": "2", "label": "Crash"}},
+    {"op": "remove", "path": "/situations/9"},
+    {"op": "move", "path": "/situations/1"}
+])
+def test_invalid_operations_are_rejected(client, operation):
+    response = patch(client, [operation])
+    assert response.status_code == 400
+
+    # Nothing of a rejected patch is applied
+    document = client.store.load("project")
+    assert [situation["id"] for situation in document["situations"]] == ["1", "2"]
+    assert document["version"] == 3
@@ -0,0 +1,65 @@
+"""The project index only re-scans the projects directory for changes made outside this process."""
+# Import necessary modules
+import json
+import os
+import time
+
+import pytest
+
+from app.modules.storage import JsonDirectoryStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = JsonDirectoryStore(str(tmp_path))
+    store.catalog.check_interval = 0
+
+    # Count the full scans of the directory
+    scan = store.catalog._scan
+    store.scans = 0
+
+    def counting_scan():
+        store.scans += 1
+        return scan()
+
+    monkeypatch.setattr(store.catalog, "_scan", counting_scan)
+    return store
+
+
+def test_writes_of_this_process_do_not_rescan(store):
+    for k in range(5):
+        store.save(f"project{k}", {"situations": []})
+        store.update(f"project{k}", lambda document: dict(document, version=1))
+        assert store.list()[0] == k + 1
+
+    store.delete("project0")
+    assert store.list()[0] == 4
+    assert store.scans == 0
+
+
+def test_outside_changes_are_picked_up(store, tmp_path):
+    store.save("local", {})
+    assert store.list()[0] == 1
+
+    with open(os.path.join(tmp_path, "outside.json"), 'w') as file:
+        json.dump({}, file)
+    # The directory modification time has a coarse resolution on some file systems
+    os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1))
+
+    assert [project['name'] for project in store.list(sort="name", descending=False)[1]] == ["local", "outside"]
+    assert store.scans == 1
+
+
+
+def test_outside_changes_before_a_local_write_are_picked_up(store, tmp_path):
+    store.save("local", {})
+    assert store.list()[0] == 1
+
+    # Another process adds a project, then this one writes before its index noticed
+    with open(os.path.join(tmp_path, "outside.json"), 'w') as file:
+        json.dump({}, file)
+    # Let the coarse directory modification time move on before the local write
+    time.sleep(0.05)
+    store.save("local", {"version": 1})
+
+    assert [project['name'] for project in store.list(sort="name", descending=False)[1]] == ["local", "outside"]
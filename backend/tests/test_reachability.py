@@ -0,0 +1,190 @@
+"""
+Reachability queries of the compiled graph against brute-force searches on random graphs,
+including the original level-by-level path length of the dictionary graph.
+"""
+# Import necessary modules
+import random
+
+import numpy as np
+import pytest
+
+from app.modules import reachability
+from app.modules.algorithm import calculate_cost, generate_p, risk_at, value_iteration
+from app.modules.graph_model import CompiledGraph, ROLE_DANGEROUS, ROLE_INITIAL
+from app.modules.risk_analysis import initialize_graph, run_risk_analysis, threat_paths
+
+SEEDS = range(300)
+
+
+def reference_path_length(paths, start_node, threat_node):
+    # The original level-by-level search over {situation name: set of successor names}
+    level = 0
+    queue = set([start_node])
+    seen = set([start_node])
+    threat_level = {}
+
+    while queue:
+        next_queue = set()
+
+        for node in queue:
+            if node not in threat_level and node in threat_node:
+                threat_level[node] = level
+
+            if node not in paths: continue
+            for neighbor in paths[node]:
+                if neighbor not in seen:
+                    next_queue.add(neighbor)
+                    seen.add(neighbor)
+
+        queue = next_queue
+        level += 1
+
+    return [level, threat_level]
+
+
+def random_graph(seed):
+    # Situations 0..n-1 with random actions (cycles and self loops included), one threat and one detection
+    rnd = random.Random(seed)
+    n = rnd.randrange(2, 12)
+    dangerous = set(rnd.sample(range(1, n), rnd.randrange(1, min(3, n - 1) + 1)))
+
+    nodes = [
+        {"id": f"s{i}", "type": "situation", "label": f"S{i}",
+         "data": {"nodeType": "initial" if i == 0 else "dangerous" if i in dangerous else "safe"}}
+        for i in range(n)
+    ]
+    edges = [
+        {"id": f"a{k}", "source": f"s{rnd.randrange(n)}", "target": f"s{rnd.randrange(n)}", "type": "action", "data": {}}
+        for k in range(rnd.randrange(n, 3 * n))
+    ]
+
+    nodes.append({"id": "t1", "type": "event", "label": "T1", "data": {"nodeType": "threat"}})
+    edges.append({"id": "te", "source": "s0", "target": "t1", "type": "event", "data": {"probability": "0.2"}})
+    nodes.append({"id": "d1", "type": "event", "label": "D1", "data": {"nodeType": "detection"}})
+    edges.append({"id": "de", "source": "s0", "target": "d1", "type": "event",
+                  "data": {"probability": "0.9", "secondaryProbability": "0.85"}})
+    return nodes, edges
+
+
+def successor_names(graph):
+    # The dictionary graph of the original implementation, without self loops
+    return {
+        graph.situation_name(i): {graph.situation_name(j) for j in graph.successors(i) if j != i}
+        for i in range(len(graph)) if len(graph.successors(i))
+    }
+
+
+def simple_paths(graph, start, targets):
+    # Every simple path from `start` that ends at the first target it reaches
+    paths = []
+
+    def extend(path):
+        if path[-1] in targets:
+            paths.append(path)
+            return
+        for neighbour in graph.successors(path[-1]):
+            if int(neighbour) not in path:
+                extend(path + [int(neighbour)])
+
+    extend([start])
+    return paths
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_path_length_matches_reference(seed):
+    graph = CompiledGraph(*random_graph(seed))
+    start = graph.nodes_with_role(ROLE_INITIAL)[0]
+    threats = graph.nodes_with_role(ROLE_DANGEROUS)
+
+    expected = reference_path_length(
+        successor_names(graph), graph.situation_name(start), [graph.situation_name(i) for i in threats]
+    )
+    assert reachability.path_length(graph, start, threats) == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_distances_to_match_breadth_first_search(seed):
+    graph = CompiledGraph(*random_graph(seed))
+    threats = set(graph.nodes_with_role(ROLE_DANGEROUS).tolist())
+
+    for node, distance in enumerate(reachability.distances_to(graph, list(threats))):
+        level, frontier, seen = 0, {node}, {node}
+        while frontier and not frontier & threats:
+            frontier = {int(j) for i in frontier for j in graph.successors(i)} - seen
+            seen |= frontier
+            level += 1
+        assert distance == (level if frontier else -1)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_k_shortest_paths_match_enumeration(seed):
+    graph = CompiledGraph(*random_graph(seed))
+    start = int(graph.nodes_with_role(ROLE_INITIAL)[0])
+    threats = set(graph.nodes_with_role(ROLE_DANGEROUS).tolist())
+    expected = sorted(len(path) for path in simple_paths(graph, start, threats))
+
+    for k in (1, 3, 10):
+        paths = reachability.k_shortest_paths(graph, start, list(threats), k)
+        assert [len(path) for path in paths] == expected[:k]
+
+        # Every path is a distinct simple path along actions that stops at its first threat
+        assert len({tuple(path.tolist()) for path in paths}) == len(paths)
+        for path in paths:
+            assert path[0] == start and len(set(path.tolist())) == len(path)
+            assert [int(i) in threats for i in path] == [False] * (len(path) - 1) + [True]
+            assert all(j in graph.successors(i) for i, j in zip(path[:-1], path[1:]))
+
+
+def test_k_shortest_paths_skip_dead_ends():
+    # A chain of diamonds with 2^40 simple paths that only leads back to the start, which a search
+    # guided by distances alone would expand path by path
+    depth = 40
+    nodes = [{"id": "s", "type": "situation", "label": "S", "data": {"nodeType": "initial"}},
+             {"id": "t", "type": "situation", "label": "T", "data": {"nodeType": "dangerous"}}]
+    edges = [{"id": "st", "source": "s", "target": "t", "type": "action", "data": {}}]
+    previous = "s"
+    for level in range(depth):
+        for side in ("a", "b"):
+            nodes.append({"id": f"{side}{level}", "type": "situation", "label": f"{side}{level}", "data": {"nodeType": "safe"}})
+            edges.append({"id": f"{previous}-{side}{level}", "source": previous, "target": f"{side}{level}", "type": "action", "data": {}})
+        nodes.append({"id": f"m{level}", "type": "situation", "label": f"m{level}", "data": {"nodeType": "safe"}})
+        for side in ("a", "b"):
+            edges.append({"id": f"{side}{level}-m", "source": f"{side}{level}", "target": f"m{level}", "type": "action", "data": {}})
+        previous = f"m{level}"
+    edges.append({"id": "back", "source": previous, "target": "s", "type": "action", "data": {}})
+
+    graph = CompiledGraph(nodes, edges)
+    start = graph.nodes_with_role(ROLE_INITIAL)[0]
+    paths = reachability.k_shortest_paths(graph, start, graph.nodes_with_role(ROLE_DANGEROUS), 5)
+    assert [[graph.labels[i] for i in path] for path in paths] == [["S", "T"]]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_path_threat_index_positions(seed):
+    graph = CompiledGraph(*random_graph(seed))
+    start = int(graph.nodes_with_role(ROLE_INITIAL)[0])
+    threats = graph.nodes_with_role(ROLE_DANGEROUS)
+
+    for path in reachability.k_shortest_paths(graph, start, threats, 3):
+        assert reachability.path_threat_index(graph, path, threats) == [len(path), {graph.situation_name(path[-1]): len(path) - 1}]
+
+    path = np.arange(len(graph), dtype=np.int64)
+    expected = {graph.situation_name(i): position for position, i in enumerate(path) if i in threats}
+    assert reachability.path_threat_index(graph, path, threats) == [len(path), expected]
+
+
+def test_risk_per_path_solves_every_path():
+    data = initialize_graph(*random_graph(7))
+    graph = data["graph"]
+    p11 = data["probability_of_rejection"]
+    p22 = data["probability_of_detection"]
+
+    payload = run_risk_analysis(data, "risk_per_path", resolution=50)
+    paths = threat_paths(graph, 10)
+    assert [point["path"] for point in payload["riskPerPath"]] == [[graph.labels[i] for i in path] for path in paths]
+
+    for point, path in zip(payload["riskPerPath"], paths):
+        p = generate_p(len(path), data["probability_of_threat"], {graph.situation_name(path[-1]): len(path) - 1})
+        a, _, _ = value_iteration(p, calculate_cost(p), p11, p22, 50)
+        assert point["length"] == len(path)
+        assert point["Risk"] == risk_at(a, min(0.99, p[0]), p11, p22)
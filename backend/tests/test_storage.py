@@ -0,0 +1,116 @@
+"""Concurrent writes of the project stores, from several threads and worker processes."""
+# Import necessary modules
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from app.modules import storage
+from app.modules.patches import VersionConflictError
+from app.modules.storage import JsonDirectoryStore, SqliteStore
+
+INCREMENTS = 50
+
+
+def increment(store, name):
+    # Read-modify-write the version like patch_project does
+    for _ in range(INCREMENTS):
+        store.update(name, lambda document: dict(document, version=document['version'] + 1))
+
+
+def increment_in_process(path, name):
+    increment(JsonDirectoryStore(path), name)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "json":
+        return JsonDirectoryStore(str(tmp_path))
+    return SqliteStore(str(tmp_path / "projects.sqlite3"))
+
+
+def test_concurrent_updates_from_threads_are_not_lost(store):
+    store.save("project", {"version": 0})
+
+    threads = [threading.Thread(target=increment, args=(store, "project")) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.load("project")["version"] == 4 * INCREMENTS
+
+
+@pytest.mark.skipif(storage.fcntl is None, reason="file locks need fcntl")
+def test_concurrent_updates_from_processes_are_not_lost(tmp_path):
+    JsonDirectoryStore(str(tmp_path)).save("project", {"version": 0})
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=increment_in_process, args=(str(tmp_path), "project")) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert JsonDirectoryStore(str(tmp_path)).load("project")["version"] == 4 * INCREMENTS
+
+
+def test_stale_versions_are_rejected(store):
+    store.save("project", {"version": 3})
+
+    def check_version(document):
+        if document["version"] != 3:
+            raise VersionConflictError(document["version"])
+        return dict(document, version=4)
+
+    store.update("project", check_version)
+    with pytest.raises(VersionConflictError):
+        store.update("project", check_version)
+    assert store.load("project")["version"] == 4
+
+
+@pytest.mark.skipif(storage.fcntl is None, reason="file locks need fcntl")
+def test_lock_files_are_removed_with_their_project(tmp_path):
+    store = JsonDirectoryStore(str(tmp_path))
+    store.save("kept", {"version": 0})
+    store.save("deleted", {"version": 0})
+
+    assert store.delete("deleted")
+    assert not store.delete("missing")
+    with pytest.raises(FileNotFoundError):
+        store.update("missing", lambda document: document)
+
+    assert os.listdir(tmp_path / ".locks") == ["kept.lock"]
+
+
+@pytest.mark.skipif(storage.fcntl is None, reason="file locks need fcntl")
+def test_lock_files_removed_while_waiting_are_locked_again(tmp_path):
+    store = JsonDirectoryStore(str(tmp_path))
+    lock_path = tmp_path / ".locks" / "project.lock"
+    locked = threading.Event()
+    release = threading.Event()
+
+    def save():
+        with store._locked("project"):
+            locked.set()
+            release.wait(5)
+            store._write("project", {"version": 1})
+
+    # Another process holds the lock while it deletes the project, and removes the lock file with it
+    with open(lock_path, 'a') as lock_file:
+        storage.fcntl.flock(lock_file, storage.fcntl.LOCK_EX)
+        thread = threading.Thread(target=save)
+        thread.start()
+        assert not locked.wait(0.1)
+        os.remove(lock_path)
+
+    # The waiting save now holds the lock of the new lock file, which others can't take meanwhile
+    assert locked.wait(5)
+    with open(lock_path, 'a') as lock_file:
+        with pytest.raises(BlockingIOError):
+            storage.fcntl.flock(lock_file, storage.fcntl.LOCK_EX | storage.fcntl.LOCK_NB)
+    release.set()
+    thread.join()
+    assert store.load("project") == {"version": 1}
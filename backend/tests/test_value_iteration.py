@@ -0,0 +1,177 @@
+"""
+Parity of the vectorized solver with the original scalar value iteration and risk matrix.
+Every backend has to reproduce the reference bit for bit, not just within a tolerance.
+"""
+# Import necessary modules
+import numpy as np
+import pytest
+
+from app.modules import kernels
+from app.modules.algorithm import (
+    IncrementalSolver,
+    RiskSurface,
+    calculate_cost,
+    calculate_risk,
+    value_iteration,
+    value_iteration_batch
+)
+
+BACKENDS = ["numpy"] + (["numba"] if kernels.BACKEND == "numba" else [])
+
+
+def reference_value_iteration(p, c, p11, p22):
+    # The original scalar value iteration on the fixed grid of 1000 steps
+    N = len(p)
+    a = np.zeros((N + 1, 999))
+    b = np.zeros((N, 999), dtype=bool)
+
+    p21 = 1 - p11
+    p12 = 1 - p22
+    a[0, :] = np.ones(999)
+
+    for i in range(1, N + 1):
+        pp = p[N - i]
+        cc = c[N - i]
+
+        g1 = pp * p21 / (pp * p21 + (1 - pp) * p22)
+        g2 = pp * p11 / (pp * p11 + (1 - pp) * p12)
+        f1 = pp * p21 + (1 - pp) * p22
+        f2 = pp * p11 + (1 - pp) * p12
+
+        for j in range(1, 1000):
+            x = j / 1000.0
+
+            g1_floor = int(np.floor(g1 * 1000))
+            g1_ceil = int(np.ceil(g1 * 1000))
+            g2_floor = int(np.floor(g2 * 1000))
+            g2_ceil = int(np.ceil(g2 * 1000))
+
+            g1_floor = min(g1_floor, 998)
+            g1_ceil = min(g1_ceil, 998)
+            g2_floor = min(g2_floor, 998)
+            g2_ceil = min(g2_ceil, 998)
+
+            vcorr = (-cc
+                     + f1 * (a[i-1, g1_floor] + (g1 * 1000 - g1_floor) * (a[i-1, g1_ceil] - a[i-1, g1_floor]))
+                     + f2 * (a[i-1, g2_floor] + (g2 * 1000 - g2_floor) * (a[i-1, g2_ceil] - a[i-1, g2_floor])))
+
+            vemp = (f1 * x * (a[i-1, g1_floor] + (g1 * 1000 - g1_floor) * (a[i-1, g1_ceil] - a[i-1, g1_floor]))
+                    + f2 * x * (a[i-1, g2_floor] + (g2 * 1000 - g2_floor) * (a[i-1, g2_ceil] - a[i-1, g2_floor])))
+
+            a[i, j-1] = max(vcorr, vemp)
+
+            if a[i, j-1] == vemp:
+                b[i-1, j-1] = True
+
+    diff_b = np.diff(b, axis=1)
+    r1, c1 = np.where(diff_b)
+
+    h = np.where(np.sum(b, axis=1) == 999)[0]
+    r1 = np.concatenate((r1, h))
+    c1 = np.concatenate((c1, np.zeros(len(h), dtype=int)))
+
+    h = np.where(np.sum(b, axis=1) == 0)[0]
+    r1 = np.concatenate((r1, h))
+    c1 = np.concatenate((c1, np.full(len(h), 999)))
+
+    ix = np.argsort(r1)[::-1]
+    r1 = r1[ix]
+    c1 = c1[ix]
+    thresh = c1 / 1000.0
+
+    return a, b, thresh
+
+
+def reference_calculate_risk(a, p, p11, p22):
+    # The original scalar risk matrix on the fixed grid of 1000 steps
+    N = a.shape[0]
+    num_x = 999
+
+    p21 = 1 - p11
+    p12 = 1 - p22
+    risk_values = np.zeros((N, num_x))
+
+    for i in range(N):
+        for j in range(999):
+            x = j / 1000.0
+
+            g1 = x * p21 / (x * p21 + (1 - x) * p22)
+            g2 = x * p11 / (x * p11 + (1 - x) * p12)
+
+            g1_floor = int(np.floor(g1 * 1000))
+            g1_ceil = int(np.ceil(g1 * 1000))
+            g2_floor = int(np.floor(g2 * 1000))
+            g2_ceil = int(np.ceil(g2 * 1000))
+
+            g1_floor = min(g1_floor, 998)
+            g1_ceil = min(g1_ceil, 998)
+            g2_floor = min(g2_floor, 998)
+            g2_ceil = min(g2_ceil, 998)
+
+            V_x = (x * p21 + (1 - x) * p22) * (a[i, g1_floor] + (g1 * 1000 - g1_floor) * (a[i, g1_ceil] - a[i, g1_floor])) + \
+                  (x * p11 + (1 - x) * p12) * (a[i, g2_floor] + (g2 * 1000 - g2_floor) * (a[i, g2_ceil] - a[i, g2_floor]))
+
+            risk_values[i, j] = 1 - V_x
+
+    return risk_values
+
+
+def random_transaction(rng):
+    # Transactions like generate_p builds: mostly safe stages with a few likely threats
+    N = int(rng.integers(1, 9))
+    p = np.round(rng.uniform(0.5, 0.99, N), 2).tolist()
+    p[int(rng.integers(N))] = 0.95
+    return p, calculate_cost(p), float(rng.uniform(0.5, 0.99)), float(rng.uniform(0.5, 0.99))
+
+
+CASES = [random_transaction(np.random.default_rng(seed)) for seed in range(12)]
+REFERENCES = [reference_value_iteration(*case) for case in CASES]
+
+
+def assert_identical(actual, expected):
+    for actual_array, expected_array in zip(actual, expected):
+        actual_array = np.asarray(actual_array)
+        assert actual_array.shape == expected_array.shape
+        assert np.array_equal(actual_array, expected_array)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("case", range(len(CASES)))
+def test_value_iteration_matches_reference(backend, case):
+    assert_identical(value_iteration(*CASES[case], backend=backend), REFERENCES[case])
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_value_iteration_batch_matches_reference(backend):
+    # Transactions of the same length are solved in one batch
+    lengths = {}
+    for case, (p, c, p11, p22) in enumerate(CASES):
+        lengths.setdefault(len(p), []).append(case)
+
+    for cases in lengths.values():
+        p, c, p11, p22 = (list(column) for column in zip(*(CASES[case] for case in cases)))
+        a, b, thresh = value_iteration_batch(p, c, p11, p22, backend=backend)
+        for k, case in enumerate(cases):
+            assert_identical((a[k], b[k], thresh[k]), REFERENCES[case])
+
+
+def test_incremental_solver_matches_reference():
+    for (p, c, p11, p22), reference in zip(CASES, REFERENCES):
+        solver = IncrementalSolver(p11, p22)
+        assert_identical(solver.solve(p, c), reference)
+        # A second solve only reuses the stage tables
+        assert_identical(solver.solve(p, c), reference)
+
+
+@pytest.mark.parametrize("case", range(0, len(CASES), 3))
+def test_calculate_risk_matches_reference(case):
+    p, c, p11, p22 = CASES[case]
+    a = REFERENCES[case][0]
+    expected = reference_calculate_risk(a, p, p11, p22)
+
+    assert np.array_equal(calculate_risk(a, p, p11, p22), expected)
+
+    surface = RiskSurface(a, p11, p22)
+    assert np.array_equal(np.asarray(surface), expected)
+    for i, j in ((0, 0), (-1, 500), (-1, 998)):
+        assert surface.cell(i, j) == expected[i, j]
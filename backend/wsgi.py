@@ -0,0 +1,20 @@
+"""
+Production entry point for WSGI servers, e.g. with the bundled Gunicorn configuration:
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+import os
+
+# Debug mode is meant for the development server of app.py, so it is off here unless set explicitly
+# (before config.py reads the environment)
+os.environ.setdefault("CYDRA_DEBUG", "false")
+
+# Import the application factory, the solver warm-up and configuration settings
+from app import create_app
+from app.modules.warmup import warm_up
+from config import Config
+
+# Create the application; with preloading this runs once, before the workers are forked
+application = create_app()
+
+if Config.WARM_UP:
+    warm_up()
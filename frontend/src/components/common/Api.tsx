@@ -83,11 +83,14 @@ export const updateProjectData = async (nodes, edges, filename) => {
   }
 };
 
-export const runRiskAnalysis = async (nodes, edges, type) => {
+export const runRiskAnalysis = async (nodes, edges, type, filename) => {
   const payload = { nodes, edges, type };
 
   try {
-    const response = await axios.post(`/api/runRiskAnalysis`, payload);
+    // The filename lets the backend reuse the solves it persisted for this project
+    const response = await axios.post(`/api/runRiskAnalysis`, payload, {
+      params: { filename },
+    });
     return response.data;
   } catch (error) {
     console.error(error);
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { Dialog } from "primereact/dialog";
 import { useEdges, useNodes } from "@xyflow/react";
+import { useLocation } from "react-router-dom";
 
 import { dialogClassName } from "./Utils";
 import { createProgressSpinner, runRiskAnalysis } from "../common";
@@ -15,6 +16,9 @@ export function AnalysisDialog({ visible, setVisible }) {
   const nodes = useNodes();
   const edges = useEdges();
 
+  // Retrieve the filename from the location state
+  const { filename } = useLocation().state || {};
+
   // -1 means no active plot
   const [selectedPlotIndex, setSelectedPlotIndex] = useState(-1);
 
@@ -58,7 +62,7 @@ export function AnalysisDialog({ visible, setVisible }) {
   async function fetchAndSetData(type = "default") {
     setIsLoading(true);
     try {
-      const data = await runRiskAnalysis(nodes, edges, type);
+      const data = await runRiskAnalysis(nodes, edges, type, filename);
       setRiskAnalysisData(data);
     } catch (error) {
       console.error("Error fetching risk analysis:", error);